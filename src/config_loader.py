@@ -61,15 +61,17 @@ class ConfigLoader:
                 print(f"Warning: Failed to load {json_file}: {e}")
         
         # Create 'all' preset combining all unique senders
-        all_senders = set()
-        for preset_data in senders.values():
-            if isinstance(preset_data, dict) and 'senders' in preset_data:
-                all_senders.update(preset_data['senders'])
+        all_senders = {
+            sender
+            for preset_data in senders.values()
+            if isinstance(preset_data, dict) and 'senders' in preset_data
+            for sender in preset_data['senders']
+        }
         
         if all_senders:
             senders['all'] = {
                 'description': 'All configured senders',
-                'senders': sorted(list(all_senders))
+                'senders': sorted(all_senders)
             }
         
         return senders
@@ -8,6 +8,7 @@ from google.auth.transport.requests import Request
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 INPUT_FILE = 'filtered_message_ids.txt'
+RAW_DECODE_CHUNK = 1024 * 1024  # base64 characters decoded per write; a multiple of 4
 
 def authenticate_gmail():
     # Get paths relative to script location
@@ -44,16 +45,21 @@ def authenticate_gmail():
         with open(token_path, 'wb') as token:
             pickle.dump(creds, token)
     
-    return build('gmail', 'v1', credentials=creds)
+    return build('gmail', 'v1', credentials=creds, cache_discovery=False, static_discovery=True)
 
 def download_eml(service, msg_id, out_dir):
     try:
         msg = service.users().messages().get(userId='me', id=msg_id, format='raw').execute()
         raw_data = msg['raw']
-        eml_bytes = base64.urlsafe_b64decode(raw_data.encode('ASCII'))
         out_path = os.path.join(out_dir, f'{msg_id}.eml')
-        with open(out_path, 'wb') as f:
-            f.write(eml_bytes)
+        # Decode a chunk at a time straight to disk so the whole decoded
+        # message is never held in memory next to its base64 text; write to
+        # a temporary name so an interrupted download isn't taken as done
+        tmp_path = f'{out_path}.part'
+        with open(tmp_path, 'wb') as f:
+            for start in range(0, len(raw_data), RAW_DECODE_CHUNK):
+                f.write(base64.urlsafe_b64decode(raw_data[start:start + RAW_DECODE_CHUNK]))
+        os.replace(tmp_path, out_path)
         return True
     except Exception as e:
         print(f"Failed to download {msg_id}: {e}")
@@ -1,13 +1,15 @@
 import os
+import sys
 import email
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from email import policy
 from email.parser import BytesParser
 
 SOURCE_DIR = 's2e2_sources'
 OUTPUT_DIR = 's2e2_markdown'
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
 def extract_text_from_email(msg):
     if msg.is_multipart():
         for part in msg.walk():
@@ -41,15 +43,59 @@ def eml_to_markdown(eml_path, md_path):
     with open(md_path, 'w', encoding='utf-8') as f:
         f.write(md_content)
 
-def convert_all_eml_to_markdown(source_dir, output_dir):
+def convert_eml_file(source_dir, filename, output_dir):
+    """Convert one .eml file from source_dir into a .md file in output_dir"""
+    eml_path = os.path.join(source_dir, filename)
+    base_name = os.path.splitext(filename)[0]
+    md_path = os.path.join(output_dir, base_name + '.md')
+    eml_to_markdown(eml_path, md_path)
+    print(f"Converted {filename} -> {base_name}.md")
+
+def warm_conversion_worker():
+    """No-op task used to start a conversion pool's workers"""
+
+def create_conversion_pool(max_workers=None):
+    """Create the process pool convert_all_eml_to_markdown parses with.
+
+    Call this before the process starts any threads (Gmail, Gemini clients,
+    download pools). On Linux workers are forked, and all of them are started
+    here, so none is forked from a multithreaded process later. Elsewhere
+    (macOS, Windows) workers are spawned, and each re-imports the calling
+    script once on start-up; creating the pool early overlaps that with the
+    fetch and filter steps.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    context = 'fork' if sys.platform.startswith('linux') else 'spawn'
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(context))
+    for _ in range(workers):
+        executor.submit(warm_conversion_worker)
+    return executor
+
+def convert_all_eml_to_markdown(source_dir, output_dir, skip=(), executor=None):
+    """Convert every .eml file in source_dir, except filenames listed in skip.
+
+    Parsing is CPU-bound and files are independent, so files are spread over
+    a process pool: the given executor (see create_conversion_pool), or one
+    created for this call.
+    """
     os.makedirs(output_dir, exist_ok=True)
-    for filename in os.listdir(source_dir):
-        if filename.lower().endswith('.eml'):
-            eml_path = os.path.join(source_dir, filename)
-            base_name = os.path.splitext(filename)[0]
-            md_path = os.path.join(output_dir, base_name + '.md')
-            eml_to_markdown(eml_path, md_path)
-            print(f"Converted {filename} -> {base_name}.md")
+    filenames = [
+        filename for filename in os.listdir(source_dir)
+        if filename.lower().endswith('.eml') and filename not in skip
+    ]
+    if len(filenames) < 2 and executor is None:
+        for filename in filenames:
+            convert_eml_file(source_dir, filename, output_dir)
+        return
+    
+    own_executor = executor is None
+    if own_executor:
+        executor = create_conversion_pool(min(os.cpu_count() or 1, len(filenames)))
+    try:
+        list(executor.map(convert_eml_file, repeat(source_dir), filenames, repeat(output_dir), chunksize=8))
+    finally:
+        if own_executor:
+            executor.shutdown()
 
 def main():
     convert_all_eml_to_markdown(SOURCE_DIR, OUTPUT_DIR)
@@ -10,9 +10,11 @@ import argparse
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 SENDERS = ['thezvi@substack.com', 'thebatch@deeplearning.ai']
 OUTPUT_FILE = 'fetched_message_ids.txt'
+MAX_RESULTS = 500  # Most message IDs fetched per query
 
 
-def authenticate_gmail():
+def load_credentials():
+    """Load (refreshing or re-authorizing if needed) the saved Gmail OAuth credentials"""
     # Get paths relative to script location
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.abspath(os.path.join(script_dir, '..', '..'))
@@ -47,22 +49,58 @@ def authenticate_gmail():
         with open(token_path, 'wb') as token:
             pickle.dump(creds, token)
     
-    return build('gmail', 'v1', credentials=creds)
+    return creds
+
+
+def build_gmail_service(creds):
+    """Build a Gmail service; it keeps its HTTP connection alive between calls"""
+    # Use the Gmail discovery document that ships with the client library
+    # instead of fetching it, so there's nothing for the discovery cache to save
+    return build('gmail', 'v1', credentials=creds, cache_discovery=False, static_discovery=True)
+
+
+def authenticate_gmail():
+    return build_gmail_service(load_credentials())
+
+
+def build_query(senders, after=None, before=None, subject_keywords=None):
+    """Build one Gmail search query matching mail from any of the senders,
+    optionally only with a subject containing one of the keywords"""
+    # Drop repeated senders (e.g. one listed in several presets), keeping order
+    query = f"from:({' OR '.join(dict.fromkeys(senders))})"
+    if subject_keywords:
+        # Quote multi-word keywords so Gmail matches them as phrases
+        keywords = [f'"{keyword}"' if ' ' in keyword else keyword for keyword in subject_keywords]
+        query += f" subject:({' OR '.join(keywords)})"
+    if after:
+        query += f" after:{after}"
+    if before:
+        query += f" before:{before}"
+    return query
 
 
-def fetch_message_ids(service, senders, after=None, before=None):
+def fetch_message_ids(service, senders, after=None, before=None, subject_keywords=None, max_results=MAX_RESULTS):
+    """Return up to max_results message IDs (newest first) matching the senders and dates"""
+    if not senders:
+        return []
+    # One query for all senders, paged; only the IDs are requested back, and
+    # paging stops once max_results IDs have been read
+    query = build_query(senders, after, before, subject_keywords)
     message_ids = []
-    for sender in senders:
-        query = f"from:{sender}"
-        if after:
-            query += f" after:{after}"
-        if before:
-            query += f" before:{before}"
-        response = service.users().messages().list(userId='me', q=query, maxResults=500).execute()
-        messages = response.get('messages', [])
-        print(f"Found {len(messages)} messages from {sender} (query: {query})")
-        for msg in messages:
-            message_ids.append(msg['id'])
+    page_token = None
+    while len(message_ids) < max_results:
+        response = service.users().messages().list(
+            userId='me', q=query, maxResults=min(500, max_results - len(message_ids)), pageToken=page_token,
+            fields='messages/id,nextPageToken'
+        ).execute()
+        message_ids.extend(msg['id'] for msg in response.get('messages', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+    message_ids = message_ids[:max_results]
+    print(f"Found {len(message_ids)} messages from {len(senders)} senders (query: {query})")
+    if page_token and len(message_ids) == max_results:
+        print(f"⚠️  Stopped at {max_results} messages; narrow the dates or raise the limit to fetch more")
     return message_ids
 
 
@@ -75,8 +113,7 @@ def main():
     service = authenticate_gmail()
     message_ids = fetch_message_ids(service, SENDERS, after=args.after, before=args.before)
     with open(OUTPUT_FILE, 'w') as f:
-        for mid in message_ids:
-            f.write(mid + '\n')
+        f.write(''.join(f'{mid}\n' for mid in message_ids))
     print(f"Saved {len(message_ids)} message IDs to {OUTPUT_FILE}")
 
 
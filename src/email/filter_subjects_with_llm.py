@@ -2,7 +2,11 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import hashlib
+import json
 import pickle
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import google.generativeai as genai
 from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -11,6 +15,18 @@ from google.auth.transport.requests import Request
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 INPUT_FILE = 'fetched_message_ids.txt'
 OUTPUT_FILE = 'filtered_message_ids.txt'
+FILTER_MODEL = 'gemini-2.5-flash'
+FILTER_BATCH_SIZE = 50  # Emails classified per model call
+
+# Filter decisions are cached on disk keyed by email text, filter and model,
+# so re-running over overlapping date ranges doesn't ask the model again
+FILTER_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gmail-to-podcast', 'llm_filter')
+
+# Optional semantic cache: an email whose embedding is at least this similar
+# to a previously decided one (for the same filter) reuses that decision
+EMBEDDING_MODEL = 'models/text-embedding-004'
+EMBEDDING_BATCH_SIZE = 100  # Most texts the embedding API takes per call
+SEMANTIC_THRESHOLD = 0.92
 
 
 def authenticate_gmail():
@@ -33,7 +49,7 @@ def authenticate_gmail():
             creds = flow.run_local_server(port=0)
         with open(token_path, 'wb') as token:
             pickle.dump(creds, token)
-    return build('gmail', 'v1', credentials=creds)
+    return build('gmail', 'v1', credentials=creds, cache_discovery=False, static_discovery=True)
 
 
 def fetch_subject(service, msg_id):
@@ -55,7 +71,7 @@ Should this email be kept? Answer YES or NO and explain briefly why.
 """
     print(prompt)
     
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    model = genai.GenerativeModel(FILTER_MODEL)
     response = model.generate_content(
         prompt,
         generation_config=genai.GenerationConfig(
@@ -67,6 +83,172 @@ Should this email be kept? Answer YES or NO and explain briefly why.
     return 'YES' in answer.upper()
 
 
+def filter_cache_path(email, filter_description):
+    """Return the cache file for a filter decision"""
+    key = hashlib.sha256(f"{email}||{filter_description}||{FILTER_MODEL}".encode('utf-8')).hexdigest()
+    return os.path.join(FILTER_CACHE_DIR, key)
+
+
+def read_filter_cache(email, filter_description):
+    """Return the cached decision for an email, or None on a cache miss"""
+    path = filter_cache_path(email, filter_description)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read() == 'YES'
+
+
+def write_filter_cache(email, filter_description, keep):
+    """Store the decision for an email, replacing the cache file atomically"""
+    os.makedirs(FILTER_CACHE_DIR, exist_ok=True)
+    path = filter_cache_path(email, filter_description)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write('YES' if keep else 'NO')
+    os.replace(tmp_path, path)
+
+
+def ask_llm_cached(email, filter_description, use_cache=True):
+    """ask_llm, reusing a decision cached on disk for the same email and filter"""
+    if use_cache:
+        keep = read_filter_cache(email, filter_description)
+        if keep is not None:
+            return keep
+    keep = ask_llm(email, filter_description)
+    write_filter_cache(email, filter_description, keep)
+    return keep
+
+
+def ask_llm_batch(emails, filter_description):
+    """Decide several emails with one model call; returns one keep flag per email.
+
+    Falls back to asking about each email separately if the reply isn't a
+    JSON array of booleans of the right length.
+    """
+    items = "\n---\n".join(f"Email {i}:\n{email}" for i, email in enumerate(emails, 1))
+    prompt = f"""
+You are an assistant that helps filter emails. The filter is: {filter_description}
+
+Below are {len(emails)} emails, numbered from 1.
+
+{items}
+
+For each email, decide whether it should be kept. Return only a JSON array of exactly {len(emails)} booleans, true to keep the email and false to drop it, in the same order as the emails.
+"""
+    model = genai.GenerativeModel(FILTER_MODEL)
+    try:
+        response = model.generate_content(
+            prompt,
+            generation_config=genai.GenerationConfig(
+                temperature=0,
+                response_mime_type='application/json'
+            )
+        )
+        keeps = json.loads(response.text)
+        if isinstance(keeps, list) and len(keeps) == len(emails) and all(isinstance(k, bool) for k in keeps):
+            return keeps
+        print(f"⚠️  Batch filter reply didn't match the {len(emails)} emails, asking one by one")
+    except (ValueError, AttributeError) as e:
+        print(f"⚠️  Could not parse batch filter reply, asking one by one: {e}")
+    return [ask_llm(email, filter_description) for email in emails]
+
+
+def ask_llm_many(emails, filter_description, use_cache=True, max_workers=8):
+    """Decide a list of emails: cached decisions first, the rest in concurrent batched calls"""
+    keeps = [read_filter_cache(email, filter_description) if use_cache else None for email in emails]
+    misses = [i for i, keep in enumerate(keeps) if keep is None]
+    batches = [misses[start:start + FILTER_BATCH_SIZE] for start in range(0, len(misses), FILTER_BATCH_SIZE)]
+    if batches:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            results = executor.map(lambda batch: ask_llm_batch([emails[i] for i in batch], filter_description), batches)
+            for batch, batch_keeps in zip(batches, results):
+                for i, keep in zip(batch, batch_keeps):
+                    keeps[i] = keep
+                    write_filter_cache(emails[i], filter_description, keep)
+    return keeps
+
+
+def embed_texts(texts):
+    """Embed texts in batches; returns unit-length vectors, one row per text"""
+    vectors = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        result = genai.embed_content(
+            model=EMBEDDING_MODEL,
+            content=texts[start:start + EMBEDDING_BATCH_SIZE],
+            task_type='semantic_similarity'
+        )
+        vectors.extend(result['embedding'])
+    vectors = np.array(vectors, dtype=np.float32).reshape(len(texts), -1)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def semantic_cache_path(filter_description):
+    """Return the semantic cache file holding decisions made for a filter"""
+    key = hashlib.sha256(f"{filter_description}||{FILTER_MODEL}||{EMBEDDING_MODEL}".encode('utf-8')).hexdigest()
+    return os.path.join(FILTER_CACHE_DIR, f"semantic-{key}.npz")
+
+
+def load_semantic_cache(filter_description):
+    """Return (vectors, keeps) previously stored for a filter, empty if none"""
+    path = semantic_cache_path(filter_description)
+    if not os.path.exists(path):
+        return np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=bool)
+    with np.load(path) as data:
+        return data['vectors'], data['keeps']
+
+
+def save_semantic_cache(filter_description, vectors, keeps):
+    """Store the decision vectors for a filter, replacing the cache file atomically"""
+    os.makedirs(FILTER_CACHE_DIR, exist_ok=True)
+    path = semantic_cache_path(filter_description)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, vectors=vectors, keeps=keeps)
+    os.replace(tmp_path, path)
+
+
+def ask_llm_semantic(emails, filter_description, decide):
+    """Decide a list of emails, reusing decisions made for near-duplicate emails.
+
+    `decide` takes the list of emails with no close match and returns their
+    keep decisions; those are then added to the semantic cache. If the
+    embeddings or the cache can't be used, every email goes to `decide`;
+    errors raised by `decide` itself propagate.
+    """
+    try:
+        vectors = embed_texts(emails)
+        cached_vectors, cached_keeps = load_semantic_cache(filter_description)
+    except Exception as e:
+        print(f"⚠️  Semantic cache unavailable, asking the model directly: {e}")
+        return decide(emails)
+    
+    keeps = [None] * len(emails)
+    if len(cached_keeps) and cached_vectors.shape[1] == vectors.shape[1]:
+        similarity = vectors @ cached_vectors.T
+        best = similarity.argmax(axis=1)
+        for i, j in enumerate(best):
+            if similarity[i, j] >= SEMANTIC_THRESHOLD:
+                keeps[i] = bool(cached_keeps[j])
+    else:
+        cached_vectors = np.empty((0, vectors.shape[1]), dtype=np.float32)
+        cached_keeps = np.empty(0, dtype=bool)
+    
+    misses = [i for i, keep in enumerate(keeps) if keep is None]
+    print(f"Semantic cache: {len(emails) - len(misses)}/{len(emails)} decisions reused")
+    if misses:
+        fresh = decide([emails[i] for i in misses])
+        for i, keep in zip(misses, fresh):
+            keeps[i] = keep
+        try:
+            save_semantic_cache(
+                filter_description,
+                np.concatenate([cached_vectors, vectors[misses]]),
+                np.concatenate([cached_keeps, np.array(fresh, dtype=bool)])
+            )
+        except OSError as e:
+            print(f"⚠️  Could not save the semantic cache: {e}")
+    return keeps
+
+
 def main():
     api_key = os.getenv('GEMINI_API_KEY')
     if not api_key:
@@ -85,14 +267,13 @@ def main():
         subject = fetch_subject(service, msg_id)
         if not subject:
             continue
-        keep = ask_llm(subject, filter_description)
+        keep = ask_llm_cached(subject, filter_description)
         print(f"Subject: {subject}\nKeep: {keep}\n---")
         if keep:
             relevant_ids.append(msg_id)
 
     with open(OUTPUT_FILE, 'w') as f:
-        for mid in relevant_ids:
-            f.write(mid + '\n')
+        f.write(''.join(f'{mid}\n' for mid in relevant_ids))
     print(f"Saved {len(relevant_ids)} relevant message IDs to {OUTPUT_FILE}")
 
 
@@ -1,30 +1,102 @@
 import os
 import re
-import google.generativeai as genai
-from google.genai import types
+from google.genai import errors, types
 from google import genai as google_genai
 import argparse
+import concurrent.futures
+import asyncio
+import functools
+import hashlib
+import random
+import shutil
+import struct
+import subprocess
+import time
 from dotenv import load_dotenv
 import wave
-import tempfile
+import numpy as np
 
-# Handle Python 3.13+ audio compatibility
-try:
-    from pydub import AudioSegment
-    from pydub.effects import normalize
-    AUDIO_AVAILABLE = True
+# Audio is assembled as raw PCM with NumPy; only the MP3 encode needs ffmpeg
+FFMPEG_AVAILABLE = shutil.which('ffmpeg') is not None
+if FFMPEG_AVAILABLE:
     print("✅ Audio processing ready")
-except ImportError as e:
-    print(f"⚠️  Audio processing issue: {e}")
-    AUDIO_AVAILABLE = False
+else:
+    print("⚠️  ffmpeg not found - audio will be saved as WAV only")
 
 load_dotenv()
 
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+
+# Gemini TTS returns 16-bit mono PCM at this rate
+SAMPLE_RATE = 24000
+
+# MP3 output is sped up by 10% for faster pacing and loudness-normalized
+PLAYBACK_SPEED = 1.1
+LOUDNORM_FILTER = 'loudnorm=I=-20:TP=-2'
+
+# Long transcripts are split into chunks of whole lines and synthesized as
+# separate TTS requests so they can run concurrently
+MAX_CHUNK_CHARS = 6000
+
+# Chunk joins get a short fade on each side and a pause in between
+CHUNK_FADE_MS = 50
+CHUNK_GAP_MS = 250
+
+# Maximum number of TTS requests in flight at once (keeps us under the rate limit)
+TTS_CONCURRENCY = int(os.getenv('TTS_CONCURRENCY', '4'))
+
+# Transient TTS failures (rate limits, server errors) are retried with
+# exponential backoff plus jitter, honouring the server's retry delay if given
+TTS_MAX_RETRIES = 4
+TTS_RETRY_CODES = {429, 500, 502, 503, 504}
+
+# Maximum number of synthesized chunks buffered between the TTS and write stages
+TTS_QUEUE_SIZE = 16
+
+# Batch mode: seconds between job status polls, and the states that end a job
+BATCH_POLL_SECONDS = 30
+BATCH_DONE_STATES = {'JOB_STATE_SUCCEEDED', 'JOB_STATE_FAILED', 'JOB_STATE_CANCELLED', 'JOB_STATE_EXPIRED'}
+
+# Synthesized chunks are cached on disk so re-rendering an unchanged script
+# does not call the TTS API again
+TTS_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gmail-to-podcast', 'tts')
+# Raw PCM is ~2.9 MB per minute of audio, so the cache is capped; the least
+# recently used chunks are removed once it grows past this size
+TTS_CACHE_MAX_MB = int(os.getenv('TTS_CACHE_MAX_MB', '500'))
+
+# Transcript speaker name -> prebuilt Gemini voice
+SPEAKER_VOICES = {
+    'Sarah': 'zephyr',
+    'Michael': 'puck',
+}
+
+# Script speaker tag number -> transcript speaker name
+SPEAKER_NAMES = {
+    '0': 'Sarah',
+    '1': 'Michael',
+}
+
+# A speaker tag line such as "**[Speaker 0] (excited):** text"; group 1 is
+# the speaker number and group 2 the text after the tag
+SPEAKER_TAG_RE = re.compile(r'(?:\*\*)?\[Speaker ([01])\](?:\s*\([^)]+\))?(?:\s*[^:]*:)?\s*(.*)')
+# A line that starts the next turn, ending a bare tag's continuation lines
+NEXT_TURN_RE = re.compile(r'\[Speaker [01]\]')
+TURN_START_RE = re.compile(r'^\[Speaker [01]\]', re.MULTILINE)
+
+# Start of a dialogue line in a formatted transcript ("Sarah: ...")
+DIALOGUE_RE = re.compile(r'^(?:' + '|'.join(map(re.escape, SPEAKER_VOICES)) + r'):', re.MULTILINE)
+
 def parse_podcast_script(script_path):
     """Parse podcast script and prepare it for multi-speaker TTS"""
     with open(script_path, 'r', encoding='utf-8') as f:
-        script_content = f.read()
-    
+        return format_podcast_script(f.read())
+
+def format_podcast_script(script_content):
+    """Convert podcast script text into a transcript for multi-speaker TTS"""
+    return '\n'.join(format_podcast_lines(script_content))
+
+def format_podcast_lines(script_content):
+    """Return the transcript lines format_podcast_script joins"""
     # Convert speaker tags to named speakers for multi-speaker TTS
     # [Speaker 0] -> Sarah:
     # [Speaker 1] -> Michael:
@@ -40,141 +112,492 @@ def parse_podcast_script(script_path):
             formatted_lines.append('')
             i += 1
             continue
-            
-        # Match speaker patterns
-        speaker0_match = re.match(r'(?:\*\*)?\[Speaker 0\](?:\s*\([^)]+\))?(?:\s*[^:]*:)?\s*(.*)', line)
-        speaker1_match = re.match(r'(?:\*\*)?\[Speaker 1\](?:\s*\([^)]+\))?(?:\s*[^:]*:)?\s*(.*)', line)
         
-        if speaker0_match:
-            text = speaker0_match.group(1).strip()
-            
-            # If text is empty, check the next line(s)
-            if not text and i + 1 < len(lines):
-                i += 1
-                text = lines[i].strip()
-                # Continue reading lines until we hit another speaker or empty line
-                while i + 1 < len(lines) and not re.match(r'\[Speaker [01]\]', lines[i + 1]) and lines[i + 1].strip():
-                    i += 1
-                    text += " " + lines[i].strip()
-            
-            if text:
-                formatted_lines.append(f"Sarah: {text}")
-                
-        elif speaker1_match:
-            text = speaker1_match.group(1).strip()
+        # Match speaker patterns
+        speaker_match = SPEAKER_TAG_RE.match(line)
+        if speaker_match:
+            text = speaker_match.group(2).strip()
             
             # If text is empty, check the next line(s)
             if not text and i + 1 < len(lines):
                 i += 1
                 text = lines[i].strip()
                 # Continue reading lines until we hit another speaker or empty line
-                while i + 1 < len(lines) and not re.match(r'\[Speaker [01]\]', lines[i + 1]) and lines[i + 1].strip():
+                while i + 1 < len(lines) and not NEXT_TURN_RE.match(lines[i + 1]) and lines[i + 1].strip():
                     i += 1
                     text += " " + lines[i].strip()
             
             if text:
-                formatted_lines.append(f"Michael: {text}")
+                formatted_lines.append(f"{SPEAKER_NAMES[speaker_match.group(1)]}: {text}")
         else:
             # Keep other lines as-is
             formatted_lines.append(line)
         
         i += 1
     
-    return '\n'.join(formatted_lines)
-
-def wave_file(filename, pcm, channels=1, rate=24000, sample_width=2):
-    """Helper function to save PCM data as WAV file"""
-    with wave.open(filename, "wb") as wf:
-        wf.setnchannels(channels)
-        wf.setsampwidth(sample_width)
-        wf.setframerate(rate)
-        wf.writeframes(pcm)
-
-def generate_multispeaker_podcast(transcript, output_path):
-    """Generate podcast audio using Gemini TTS multi-speaker API"""
-    
-    try:
-        print("🎤 Generating multi-speaker podcast audio...")
-        print("   Sarah: Zephyr voice (analytical female)")
-        print("   Michael: Puck voice (enthusiastic male)")
-        
-        # Create client
-        client = google_genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-        
-        # Generate with multi-speaker configuration
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-tts",
-            contents=transcript,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
-                        speaker_voice_configs=[
-                            types.SpeakerVoiceConfig(
-                                speaker='Sarah',
-                                voice_config=types.VoiceConfig(
-                                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                        voice_name='zephyr',
-                                    )
-                                )
-                            ),
-                            types.SpeakerVoiceConfig(
-                                speaker='Michael',
-                                voice_config=types.VoiceConfig(
-                                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                        voice_name='puck',
-                                    )
-                                )
-                            ),
-                        ]
+    return formatted_lines
+
+# Canonical 44-byte PCM WAV header: RIFF chunk, fmt chunk, data chunk header
+WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+def wave_file(filename, pcm, channels=1, rate=SAMPLE_RATE, sample_width=2):
+    """Helper function to save PCM data as WAV file, writing a packed header instead of going through wave"""
+    header = WAV_HEADER.pack(
+        b'RIFF', WAV_HEADER.size - 8 + len(pcm), b'WAVE',
+        b'fmt ', 16, 1, channels, rate, rate * channels * sample_width, channels * sample_width, sample_width * 8,
+        b'data', len(pcm)
+    )
+    with open(filename, 'wb') as f:
+        f.write(header)
+        f.write(pcm)
+
+def silence_pcm(ms, rate=SAMPLE_RATE):
+    """Return ms milliseconds of 16-bit mono silence"""
+    return np.zeros(int(rate * ms / 1000), dtype=np.int16).tobytes()
+
+def fade_pcm(pcm, fade_ms=CHUNK_FADE_MS, rate=SAMPLE_RATE):
+    """Apply a linear fade-in and fade-out of fade_ms to 16-bit mono PCM"""
+    samples = np.frombuffer(pcm, dtype=np.int16).copy()
+    n_fade = min(int(rate * fade_ms / 1000), samples.size // 2)
+    if n_fade == 0:
+        return pcm
+    ramp = np.linspace(0, 1, n_fade, dtype=np.float32)
+    samples[:n_fade] = (samples[:n_fade] * ramp).astype(np.int16)
+    samples[-n_fade:] = (samples[-n_fade:] * ramp[::-1]).astype(np.int16)
+    return samples.tobytes()
+
+def start_mp3_encoder(output_path, rate=SAMPLE_RATE, channels=1, bitrate="192k", speed=PLAYBACK_SPEED):
+    """Start an ffmpeg process that encodes 16-bit PCM written to its stdin as MP3.
+
+    Loudness normalization and the speed-up both run in ffmpeg's filter graph,
+    so PCM can be fed in as it is synthesized and the MP3 is finished as soon
+    as the last chunk arrives.
+    """
+    return subprocess.Popen(
+        ['ffmpeg', '-y', '-loglevel', 'error',
+         '-f', 's16le', '-ar', str(rate), '-ac', str(channels), '-i', 'pipe:0',
+         '-af', f'{LOUDNORM_FILTER},atempo={speed}',
+         '-ar', str(rate), '-b:a', bitrate, '-f', 'mp3', output_path],
+        stdin=subprocess.PIPE
+    )
+
+def finish_mp3_encoder(proc):
+    """Close the encoder's input and wait for ffmpeg to finish writing the MP3"""
+    proc.stdin.close()
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg exited with status {proc.returncode}")
+
+def chunk_transcript_lines(lines, max_chars=MAX_CHUNK_CHARS):
+    """Group transcript lines into chunks of whole lines for separate TTS requests"""
+    current = []
+    current_size = 0
+
+    for line in lines:
+        if current and current_size + len(line) > max_chars:
+            chunk = '\n'.join(current)
+            if chunk.strip():
+                yield chunk
+            current = []
+            current_size = 0
+        current.append(line)
+        current_size += len(line) + 1
+
+    chunk = '\n'.join(current)
+    if chunk.strip():
+        yield chunk
+
+def split_transcript(transcript, max_chars=MAX_CHUNK_CHARS):
+    """Split a formatted transcript into chunks of whole lines for separate TTS requests"""
+    return list(chunk_transcript_lines(transcript.split('\n'), max_chars))
+
+def last_turn_start(text):
+    """Offset of the last line where format_podcast_script starts a new turn, or 0.
+
+    A tag line directly after a bare tag is that tag's text, not a new turn,
+    so it isn't a safe place to split.
+    """
+    for match in reversed(list(TURN_START_RE.finditer(text))):
+        start = match.start()
+        if start == 0:
+            return 0
+        previous = text[text.rfind('\n', 0, start - 1) + 1:start - 1].strip()
+        tag = SPEAKER_TAG_RE.match(previous)
+        if not tag or tag.group(2).strip():
+            return start
+    return 0
+
+def stream_transcript_lines(script_pieces):
+    """Yield formatted transcript lines from script text that arrives in pieces.
+
+    Text is only formatted up to the start of the latest speaker tag, so a
+    turn is never emitted while more of it may still be on the way.
+    """
+    buffer = ''
+    for piece in script_pieces:
+        buffer += piece
+        start = last_turn_start(buffer)
+        if start > 0:
+            yield from format_podcast_lines(buffer[:start - 1])
+            buffer = buffer[start:]
+    if buffer:
+        yield from format_podcast_lines(buffer)
+
+def stream_transcript_chunks(script_pieces, max_chars=MAX_CHUNK_CHARS):
+    """Yield TTS chunks from script text that arrives in pieces (e.g. a streamed Gemini response)"""
+    return chunk_transcript_lines(stream_transcript_lines(script_pieces), max_chars)
+
+def tts_cache_path(chunk):
+    """Return the cache file for a transcript chunk, keyed on model, voices and text"""
+    voices = ','.join(f"{speaker}={voice}" for speaker, voice in SPEAKER_VOICES.items())
+    key = hashlib.blake2b(f"{TTS_MODEL}|{voices}|{chunk}".encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, f"{key}.pcm")
+
+def read_tts_cache(chunk):
+    """Return cached PCM for a transcript chunk, or None on a cache miss"""
+    path = tts_cache_path(chunk)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        pcm = f.read()
+    # Mark the chunk as recently used so pruning keeps it
+    os.utime(path)
+    return pcm
+
+def write_tts_cache(chunk, pcm):
+    """Store PCM for a transcript chunk, replacing the cache file atomically"""
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    path = tts_cache_path(chunk)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(pcm)
+    os.replace(tmp_path, path)
+
+def prune_tts_cache(max_mb=TTS_CACHE_MAX_MB):
+    """Delete the least recently used cached chunks until the cache fits in max_mb"""
+    if not os.path.isdir(TTS_CACHE_DIR):
+        return
+    with os.scandir(TTS_CACHE_DIR) as entries:
+        files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                 for entry in entries if entry.name.endswith('.pcm')]
+    total = sum(size for _, size, _ in files)
+    limit = max_mb * 1024 * 1024
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        print(f"🧹 Removed {removed} old TTS cache file(s) to stay under {max_mb} MB")
+
+_client = None
+
+def get_client():
+    """Return the shared Gemini client, creating it on first use.
+
+    Reusing one client keeps its HTTP connection pool (and TLS sessions)
+    alive across every TTS request instead of setting them up per call.
+    """
+    global _client
+    if _client is None:
+        _client = google_genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
+    return _client
+
+@functools.lru_cache(maxsize=None)
+def build_speech_config():
+    """Build the multi-speaker TTS configuration from SPEAKER_VOICES (built once and reused)"""
+    return types.GenerateContentConfig(
+        response_modalities=["AUDIO"],
+        speech_config=types.SpeechConfig(
+            multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
+                speaker_voice_configs=[
+                    types.SpeakerVoiceConfig(
+                        speaker=speaker,
+                        voice_config=types.VoiceConfig(
+                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                                voice_name=voice_name,
+                            )
+                        )
                     )
-                )
+                    for speaker, voice_name in SPEAKER_VOICES.items()
+                ]
             )
         )
-        
-        # Extract audio data
-        if response.candidates and len(response.candidates) > 0:
-            candidate = response.candidates[0]
-            if candidate.content and candidate.content.parts and len(candidate.content.parts) > 0:
-                part = candidate.content.parts[0]
-                if hasattr(part, 'inline_data') and part.inline_data:
-                    # Save as WAV first
-                    wav_path = output_path.replace('.mp3', '.wav')
-                    wave_file(wav_path, part.inline_data.data)
-                    
-                    print(f"✅ Generated multi-speaker audio: {wav_path}")
-                    
-                    # Convert to MP3 if needed
-                    if output_path.endswith('.mp3') and AUDIO_AVAILABLE:
-                        try:
-                            audio = AudioSegment.from_wav(wav_path)
-                            # Normalize audio levels
-                            audio = normalize(audio)
-                            # Speed up by 10% for faster pacing
-                            audio = audio._spawn(audio.raw_data, overrides={
-                                "frame_rate": int(audio.frame_rate * 1.1)
-                            }).set_frame_rate(audio.frame_rate)
-                            
-                            audio.export(output_path, format="mp3", bitrate="192k")
-                            print(f"✅ Converted to MP3 with 10% speed increase: {output_path}")
-                            
-                            # Calculate duration
-                            duration = len(audio) / 1000
-                            print(f"⏱️  Duration: {duration:.1f} seconds ({duration/60:.1f} minutes)")
-                        except Exception as e:
-                            print(f"⚠️  Could not convert to MP3: {e}")
-                    
-                    return True
-        
-        print("❌ No audio data found in response")
-        return False
-        
+    )
+
+def extract_audio_data(response):
+    """Return the PCM bytes from a TTS response, or None if there is no audio"""
+    if response.candidates and len(response.candidates) > 0:
+        candidate = response.candidates[0]
+        if candidate.content and candidate.content.parts and len(candidate.content.parts) > 0:
+            part = candidate.content.parts[0]
+            if hasattr(part, 'inline_data') and part.inline_data:
+                return part.inline_data.data
+    return None
+
+def retry_delay(error, attempt):
+    """Return seconds to wait before retrying a failed TTS request.
+
+    Uses the RetryInfo delay from a 429 response when the API provides one,
+    otherwise exponential backoff with up to a second of jitter.
+    """
+    details = error.details.get('error', {}).get('details', []) if isinstance(error.details, dict) else []
+    for detail in details:
+        if detail.get('@type', '').endswith('RetryInfo'):
+            match = re.match(r'([\d.]+)s$', detail.get('retryDelay', ''))
+            if match:
+                return float(match.group(1))
+    return 2 ** attempt + random.random()
+
+async def request_chunk_audio(client, chunk, config, semaphore):
+    """Request audio for one transcript chunk, retrying transient API errors without blocking the event loop"""
+    for attempt in range(TTS_MAX_RETRIES + 1):
+        try:
+            async with semaphore:
+                response = await client.aio.models.generate_content(
+                    model=TTS_MODEL,
+                    contents=chunk,
+                    config=config
+                )
+            return extract_audio_data(response)
+        except errors.APIError as e:
+            if e.code not in TTS_RETRY_CODES or attempt == TTS_MAX_RETRIES:
+                raise
+            delay = retry_delay(e, attempt)
+            print(f"   ⚠️  TTS request failed ({e.code}), retrying in {delay:.1f}s...")
+            # Sleep outside the semaphore so other chunks can use the slot
+            await asyncio.sleep(delay)
+
+async def synthesize_chunks(chunks, on_audio, use_cache=True, total_chunks=None):
+    """Synthesize transcript chunks concurrently, passing PCM to on_audio in script order.
+
+    chunks may be any iterable, including a generator that blocks while more
+    of the script is still being written; it is drained on a worker thread
+    and a TTS request task is started for each chunk as soon as it arrives.
+    The consumer awaits those tasks in order and hands each chunk to on_audio
+    as soon as it and every earlier chunk are done, so writing overlaps with
+    requests that are still in flight.
+    """
+    client = get_client()
+    config = build_speech_config()
+    tts_q = asyncio.Queue(maxsize=TTS_QUEUE_SIZE)
+    semaphore = asyncio.Semaphore(TTS_CONCURRENCY)
+
+    async def synthesize(chunk):
+        pcm = read_tts_cache(chunk) if use_cache else None
+        if pcm is None:
+            pcm = await request_chunk_audio(client, chunk, config, semaphore)
+            if pcm and use_cache:
+                write_tts_cache(chunk, pcm)
+        return pcm
+
+    async def producer():
+        chunk_iter = iter(chunks)
+        # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunk_iter, None)
+            if chunk is None:
+                break
+            await tts_q.put(asyncio.create_task(synthesize(chunk)))
+        await tts_q.put(None)
+
+    async def consumer():
+        written = 0
+        while True:
+            task = await tts_q.get()
+            if task is None:
+                break
+            pcm = await task
+            written += 1
+            if not pcm:
+                raise RuntimeError(f"No audio data found for chunk {written}")
+            on_audio(pcm)
+            print(f"   ✓ Chunk {written}/{total_chunks} written" if total_chunks else f"   ✓ Chunk {written} written")
+
+    await asyncio.gather(producer(), consumer())
+
+async def synthesize_transcript(transcript, on_audio, use_cache=True):
+    """Synthesize a formatted transcript in concurrent chunks, passing PCM to on_audio in script order"""
+    chunks = split_transcript(transcript)
+    print(f"   Split transcript into {len(chunks)} TTS request(s)")
+    await synthesize_chunks(chunks, on_audio, use_cache, total_chunks=len(chunks))
+
+def synthesize_transcript_batch(transcript, use_cache=True):
+    """Synthesize all transcript chunks in a single Gemini batch job.
+
+    Batch jobs are billed at a discount but are queued server-side, so this
+    can take minutes (or longer) to complete. Returns the PCM for every
+    chunk, in order, once all of them have succeeded.
+    """
+    chunks = split_transcript(transcript)
+    pcm_chunks = [read_tts_cache(chunk) if use_cache else None for chunk in chunks]
+    missing = [index for index, pcm in enumerate(pcm_chunks) if pcm is None]
+
+    if missing:
+        submit_batch_job(chunks, missing, pcm_chunks, use_cache)
+
+    return pcm_chunks
+
+def submit_batch_job(chunks, missing, pcm_chunks, use_cache):
+    """Run one batch job for the chunks at the missing indices, filling pcm_chunks in place"""
+    print(f"   Submitting {len(missing)} TTS request(s) as one batch job")
+
+    client = get_client()
+    config = build_speech_config()
+    job = client.batches.create(
+        model=TTS_MODEL,
+        src=[types.InlinedRequest(contents=chunks[index], config=config) for index in missing],
+        config={'display_name': 'podcast-tts'}
+    )
+
+    while job.state.name not in BATCH_DONE_STATES:
+        print(f"   ⏳ Batch job {job.name}: {job.state.name}")
+        time.sleep(BATCH_POLL_SECONDS)
+        job = client.batches.get(name=job.name)
+
+    if job.state.name != 'JOB_STATE_SUCCEEDED':
+        raise RuntimeError(f"Batch job ended in state {job.state.name}")
+
+    responses = job.dest.inlined_responses if job.dest else None
+    if not responses or len(responses) != len(missing):
+        raise RuntimeError("Batch job returned an unexpected number of responses")
+
+    for index, inlined in zip(missing, responses):
+        pcm = extract_audio_data(inlined.response) if inlined.response else None
+        if not pcm:
+            raise RuntimeError(f"No audio data found for chunk {index + 1}")
+        pcm_chunks[index] = pcm
+        if use_cache:
+            write_tts_cache(chunks[index], pcm)
+
+def generate_multispeaker_podcast(transcript, output_path, use_batch=False, use_cache=True, segments_dir=None):
+    """Generate podcast audio using Gemini TTS multi-speaker API.
+
+    transcript is either formatted transcript text or an iterable of
+    transcript chunks that may still be arriving (see stream_transcript_chunks).
+    """
+
+    encoder = None
+    wf = None
+    part_path = None
+    try:
+        print("🎤 Generating multi-speaker podcast audio...")
+        for speaker, voice_name in SPEAKER_VOICES.items():
+            print(f"   {speaker}: {voice_name.title()} voice")
+
+        # Stream synthesized chunks straight into ffmpeg for MP3 output, or
+        # into a WAV file when MP3 isn't requested or ffmpeg is missing. Both
+        # are written to a .part file that only replaces the output once
+        # every chunk has been synthesized, so a failed run leaves any
+        # previous output in place
+        to_mp3 = output_path.endswith('.mp3') and FFMPEG_AVAILABLE
+        audio_path = output_path if to_mp3 else output_path.replace('.mp3', '.wav')
+        part_path = f"{audio_path}.part"
+        if to_mp3:
+            encoder = start_mp3_encoder(part_path)
+            write_pcm = encoder.stdin.write
+        else:
+            wf = wave.open(part_path, "wb")
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            write_pcm = wf.writeframes
+        total_frames = 0
+        segment_count = 0
+
+        # Optionally keep each synthesized chunk as its own WAV, written on a
+        # background thread so it never holds up the main output
+        segment_writer = None
+        if segments_dir:
+            os.makedirs(segments_dir, exist_ok=True)
+            segment_writer = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        segment_futures = []
+
+        def write_chunk(pcm):
+            nonlocal total_frames, segment_count
+            # Fade each chunk's edges and separate chunks with a short
+            # pause so separately synthesized requests join without clicks
+            if total_frames:
+                gap = silence_pcm(CHUNK_GAP_MS)
+                write_pcm(gap)
+                total_frames += len(gap) // 2
+            pcm = fade_pcm(pcm)
+            write_pcm(pcm)
+            total_frames += len(pcm) // 2
+            segment_count += 1
+            if segment_writer:
+                segment_path = os.path.join(segments_dir, f"segment_{segment_count:03d}.wav")
+                segment_futures.append(segment_writer.submit(wave_file, segment_path, pcm))
+
+        if not isinstance(transcript, str):
+            # Chunks are requested as they arrive; batch mode needs them all up front
+            asyncio.run(synthesize_chunks(transcript, write_chunk, use_cache))
+        else:
+            pcm_chunks = None
+            if use_batch:
+                # Only batch failures fall back; nothing has been written yet,
+                # and write errors below propagate rather than writing twice
+                try:
+                    pcm_chunks = synthesize_transcript_batch(transcript, use_cache)
+                except Exception as e:
+                    print(f"⚠️  Batch TTS failed ({e}), falling back to direct requests")
+            if pcm_chunks is None:
+                asyncio.run(synthesize_transcript(transcript, write_chunk, use_cache))
+            else:
+                for pcm in pcm_chunks:
+                    write_chunk(pcm)
+
+        if to_mp3:
+            finish_mp3_encoder(encoder)
+            encoder = None
+            os.replace(part_path, audio_path)
+            part_path = None
+            print(f"✅ Generated multi-speaker MP3 with 10% speed increase: {output_path}")
+            duration = total_frames / SAMPLE_RATE / PLAYBACK_SPEED
+        else:
+            wf.close()
+            wf = None
+            os.replace(part_path, audio_path)
+            part_path = None
+            print(f"✅ Generated multi-speaker audio: {audio_path}")
+            duration = total_frames / SAMPLE_RATE
+        print(f"⏱️  Duration: {duration:.1f} seconds ({duration/60:.1f} minutes)")
+
+        if segment_writer:
+            for future in segment_futures:
+                future.result()
+            segment_writer.shutdown()
+            print(f"✅ Saved {segment_count} audio segment(s) to {segments_dir}")
+
+        return True
+
     except Exception as e:
         print(f"❌ Error generating multi-speaker audio: {e}")
         if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
             print("   ⚠️  Hit quota limit. Try again later.")
         return False
 
+    finally:
+        # Don't leave a half-written MP3 encode running after a failure
+        if encoder:
+            encoder.kill()
+            encoder.wait()
+        if wf:
+            wf.close()
+        if use_cache:
+            try:
+                prune_tts_cache()
+            except OSError as e:
+                print(f"⚠️  Could not prune the TTS cache: {e}")
+        # part_path is only still set if the output wasn't completed
+        if part_path and os.path.exists(part_path):
+            os.remove(part_path)
+
 # Backward compatibility functions for pipeline
 def create_podcast_audio(segments, output_dir="podcast_audio_segments"):
     """Legacy function for backward compatibility - now generates complete audio"""
@@ -182,7 +605,7 @@ def create_podcast_audio(segments, output_dir="podcast_audio_segments"):
     # and return a dummy segments list
     return ["dummy_segment"]  # Pipeline expects a non-empty list
 
-def combine_audio_segments(audio_segments, output_path):
+def combine_audio_segments(audio_segments, output_path, use_cache=True):
     """Legacy function for backward compatibility - generates the actual audio"""
     # Check for Gemini API key
     api_key = os.getenv('GEMINI_API_KEY')
@@ -202,14 +625,20 @@ def combine_audio_segments(audio_segments, output_path):
     print(f"📝 Parsing podcast script...")
     formatted_transcript = parse_podcast_script(script_path)
     
-    # Generate multi-speaker audio in one API call
-    print(f"🎯 Generating entire podcast in ONE API call...")
-    return generate_multispeaker_podcast(formatted_transcript, output_path)
+    # Generate multi-speaker audio (long scripts are split into concurrent chunks)
+    print(f"🎯 Generating podcast audio with multi-speaker TTS...")
+    return generate_multispeaker_podcast(formatted_transcript, output_path, use_cache=use_cache)
 
 def main():
     parser = argparse.ArgumentParser(description='Generate podcast audio using Gemini TTS multi-speaker API')
     parser.add_argument('--script', type=str, required=True, help='Path to podcast script file')
     parser.add_argument('--output', type=str, default='podcast.mp3', help='Output audio file')
+    parser.add_argument('--batch', action='store_true',
+                        help='Use Gemini batch mode (cheaper, but the job may take a while to run)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignore cached TTS audio and call the API for every chunk')
+    parser.add_argument('--keep-segments', action='store_true',
+                        help='Also save each synthesized chunk as a WAV file next to the output')
     args = parser.parse_args()
     
     # Check for Gemini API key
@@ -223,20 +652,22 @@ def main():
     formatted_transcript = parse_podcast_script(args.script)
     
     # Count dialogue lines
-    dialogue_count = len([line for line in formatted_transcript.split('\n') if line.startswith(('Sarah:', 'Michael:'))])
+    dialogue_count = len(DIALOGUE_RE.findall(formatted_transcript))
     print(f"📊 Found {dialogue_count} dialogue segments")
     
-    # Preview first few lines
-    preview_lines = formatted_transcript.split('\n')[:5]
+    # Preview first few lines (only split off as many as we show)
+    preview_lines = formatted_transcript.split('\n', 5)[:5]
     print("\n📄 Preview of formatted transcript:")
     for line in preview_lines:
         if line:
             print(f"   {line}")
     print("   ...")
     
-    # Generate multi-speaker audio in one API call
-    print(f"\n🎯 Generating entire podcast in ONE API call...")
-    success = generate_multispeaker_podcast(formatted_transcript, args.output)
+    # Generate multi-speaker audio (long scripts are split into concurrent chunks)
+    print(f"\n🎯 Generating podcast audio with multi-speaker TTS...")
+    segments_dir = os.path.splitext(args.output)[0] + '_segments' if args.keep_segments else None
+    success = generate_multispeaker_podcast(formatted_transcript, args.output, use_batch=args.batch,
+                                            use_cache=not args.no_cache, segments_dir=segments_dir)
     
     if success:
         print(f"\n✅ Podcast audio generation complete!")
@@ -245,7 +676,7 @@ def main():
         print("   ✓ Multi-speaker dialogue with distinct voices")
         print("   ✓ Natural conversation flow")
         print("   ✓ 10% faster pacing")
-        print("   ✓ Single API call (no quota issues!)")
+        print("   ✓ Long scripts synthesized in concurrent chunks")
     else:
         print("\n❌ Failed to generate podcast audio")
 
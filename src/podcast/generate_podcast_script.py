@@ -1,46 +1,78 @@
 import os
-import glob
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def read_markdown_files(markdown_dir):
-    """Read all markdown files from a directory and return their content"""
-    markdown_files = glob.glob(os.path.join(markdown_dir, "*.md"))
-    content_pieces = []
-    
-    for file_path in markdown_files:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            content_pieces.append({
-                'filename': os.path.basename(file_path),
-                'content': content
-            })
-    
-    return content_pieces
+# Prompt styles: 'multispeaker' writes [Speaker 0]/[Speaker 1] turns in the
+# NotebookLM Audio Overview style for the multi-speaker TTS; 'legacy' writes
+# [SARAH]/[MICHAEL] turns with [PAUSE]/[MUSIC] cues
+SCRIPT_STYLES = {
+    'multispeaker': {
+        'model': 'gemini-2.5-pro',
+        'temperature': 0.8,  # Slightly higher for more natural variation
+        'prompt': """
+You are a podcast script writer creating a {duration_minutes}-minute conversational podcast in the style of NotebookLM's Audio Overview.
 
-def generate_podcast_script(markdown_content, duration_minutes=30):
-    """Generate a podcast script from markdown content using Gemini"""
-    
-    # Combine all content into a single string for analysis
-    combined_content = "\n\n---\n\n".join([
-        f"Article: {piece['filename']}\n{piece['content']}" 
-        for piece in markdown_content
-    ])
-    
-    # Truncate if too long (keeping within token limits)
-    if len(combined_content) > 50000:
-        combined_content = combined_content[:50000] + "\n\n[Content truncated...]"
-    
-    # Calculate approximate word count target based on duration
-    # Average speaking rate is about 140-160 words per minute for conversational content
-    target_words = duration_minutes * 150  # Using 150 WPM as middle ground
-    
-    # Adjust max_tokens based on duration (rough estimate: 1 token ≈ 0.75 words)
-    max_tokens = min(8000, int(target_words * 1.5))  # Cap at 8000 tokens for API limits
-    
-    prompt = f"""
+CRITICAL RULES:
+1. Hosts should introduce themselves ONLY at the very beginning (e.g., "I'm Sarah" and "I'm Michael")
+2. After introductions, NEVER have hosts say their own names again during the conversation
+3. Use natural conversation flow with quick back-and-forth exchanges
+4. Include natural interruptions, overlapping dialogue, and reactions
+5. Keep responses short and punchy - most exchanges should be 1-3 sentences
+6. Use conversational fillers and reactions like "mm-hmm", "yeah", "right", "exactly", "oh", "ah"
+7. NO explicit pause markers - let conversation flow naturally
+8. Include emotional variety - surprise ("Wow!"), curiosity ("Hmm, that's interesting..."), agreement ("Absolutely!"), thoughtfulness ("You know, that makes me think...")
+9. Use natural speech patterns including occasional "uh", "um", trailing off with "...", and incomplete thoughts
+
+The two hosts:
+- Speaker 0 (female): More analytical, asks probing questions, provides context
+- Speaker 1 (male): More enthusiastic, makes connections, adds energy
+
+Format the script EXACTLY like this:
+[Speaker 0] Text here
+[Speaker 1] Text here
+
+Example opening:
+[Speaker 0] Welcome to our deep dive into [topic]. I'm Sarah.
+[Speaker 1] And I'm Michael. Today we're looking at some really fascinating material.
+[Speaker 0] Right, so let's jump in...
+
+Example of natural flow (after intro):
+[Speaker 0] So, the sheer speed of change in AI is... I, I mean, it's just astounding.
+[Speaker 1] It really is.
+[Speaker 0] But here's this thought from, uh, one of the leading voices at OpenAI that really stuck with me...
+
+IMPORTANT: Make the conversation feel REAL - with genuine reactions, natural interruptions, incomplete thoughts, and authentic engagement. The hosts should sound like they're discovering insights together, not reading a script.
+
+Content to discuss:
+{combined_content}
+
+Create an engaging {duration_minutes}-minute podcast script (approximately {target_words} words) that covers the most interesting and important points from this content. Focus on making it sound like a genuine, dynamic conversation between two intelligent people who are genuinely excited about the topic.
+""",
+        # Simpler prompt to retry with when the first one is blocked by safety filters
+        'safer_prompt': """
+Create a {duration_minutes}-minute conversational podcast script between two hosts discussing technology news and insights.
+
+Format:
+[Speaker 0] (female host Sarah)
+[Speaker 1] (male host Michael)
+
+The hosts should introduce themselves at the beginning, then have a natural conversation about the key points from the articles provided. Keep it informative but engaging.
+
+Content summary to discuss:
+{content_summary}  # Limit content size
+
+Generate approximately {target_words} words.
+""",
+    },
+    'legacy': {
+        'model': 'gemini-2.5-flash',
+        'temperature': 0.7,
+        'prompt': """
 You are a podcast script writer. Create a {duration_minutes}-minute conversational podcast script between two hosts discussing the content provided below. 
 
 The podcast should be in the style of NotebookLM's Audio Overview - engaging, informative, and conversational. The two hosts should:
@@ -62,23 +94,305 @@ Content to discuss:
 {combined_content}
 
 Create an engaging {duration_minutes}-minute podcast script (approximately {target_words} words) that covers the most interesting and important points from this content. Adjust the depth of discussion and number of topics covered to fit the {duration_minutes}-minute timeframe.
+""",
+    },
+}
+
+# Returned by the multispeaker style when script generation fails outright
+FALLBACK_SCRIPT = """[Speaker 0] Welcome to our tech news deep dive. I'm Sarah.
+[Speaker 1] And I'm Michael. We've got some interesting developments to discuss today.
+[Speaker 0] That's right. Unfortunately, we encountered some technical difficulties processing the full content, but let's talk about what we can.
+[Speaker 1] Technology is moving at such an incredible pace these days.
+[Speaker 0] It really is. Every week brings new breakthroughs and challenges.
+[Speaker 1] Well, that's all for today's episode. Thanks for listening!
+[Speaker 0] See you next time!"""
+
+# Article text is cut to this many tokens (as counted by the script model)
+# before it goes into the prompt
+MAX_CONTENT_TOKENS = 12500
+
+# Characters kept before counting tokens, so count_tokens never sees an
+# unbounded string; generous enough that the token limit normally decides
+MAX_CONTENT_CHARS = MAX_CONTENT_TOKENS * 8
+
+# Rough characters per token, used only if the token count can't be fetched
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_MARKER = "\n\n[Content truncated...]"
+
+# Optional map step: each article is condensed by a fast model in parallel
+# before the single script call, so long batches fit without truncation
+SUMMARY_MODEL = 'gemini-2.5-flash'
+SUMMARY_WORDS = 200
+SUMMARY_CONCURRENCY = 8
+SUMMARY_PROMPT = """Summarize the following newsletter article in about {summary_words} words. Keep the concrete facts, names, numbers and any surprising or opinionated points a podcast could discuss.
+
+{content}
 """
 
-    model = genai.GenerativeModel('gemini-2.5-flash')
+# Generated scripts are cached on disk keyed by model and prompt, so re-running
+# over unchanged articles doesn't call Gemini again
+SCRIPT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gmail-to-podcast', 'scripts')
+
+def read_markdown_file(file_path):
+    """Read one markdown file into a content piece"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return {
+            'filename': os.path.basename(file_path),
+            'content': f.read()
+        }
+
+def read_markdown_files(markdown_dir):
+    """Read all markdown files from a directory and return their content"""
+    if not os.path.isdir(markdown_dir):
+        return []
+    # DirEntry.is_file() uses the d_type from the directory listing, so this
+    # needs no per-file stat call
+    with os.scandir(markdown_dir) as entries:
+        markdown_files = sorted(entry.path for entry in entries if entry.name.endswith('.md') and entry.is_file())
+    if not markdown_files:
+        return []
+    
+    # Reads are I/O-bound, so overlap them on a thread pool. scandir order is
+    # arbitrary; sorting keeps the prompt (and its cache key) stable.
+    max_workers = min(32, (os.cpu_count() or 1) * 4, len(markdown_files))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read_markdown_file, markdown_files))
+
+def script_cache_path(model_name, prompt):
+    """Return the cache file for a script prompt, keyed on model and prompt text"""
+    key = hashlib.sha256(f"{model_name}|{prompt}".encode('utf-8')).hexdigest()
+    return os.path.join(SCRIPT_CACHE_DIR, f"{key}.txt")
+
+def read_script_cache(model_name, prompt):
+    """Return the cached script for a prompt, or None on a cache miss"""
+    path = script_cache_path(model_name, prompt)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def write_script_cache(model_name, prompt, script):
+    """Store the script for a prompt, replacing the cache file atomically"""
+    os.makedirs(SCRIPT_CACHE_DIR, exist_ok=True)
+    path = script_cache_path(model_name, prompt)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(script)
+    os.replace(tmp_path, path)
+
+@functools.lru_cache(maxsize=4)
+def get_model(model_name):
+    """Return a shared GenerativeModel, configuring the API key on first use"""
+    genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+    return genai.GenerativeModel(model_name)
+
+def summarize_markdown_piece(model, piece, use_cache=True):
+    """Condense one article to a short summary, keeping the original on failure"""
+    prompt = SUMMARY_PROMPT.format(summary_words=SUMMARY_WORDS, content=piece['content'])
+    if use_cache:
+        cached = read_script_cache(SUMMARY_MODEL, prompt)
+        if cached is not None:
+            return {'filename': piece['filename'], 'content': cached}
+    try:
+        response = model.generate_content(prompt)
+        summary = response.text
+    except Exception as e:
+        print(f"⚠️  Could not summarize {piece['filename']}, using full text: {e}")
+        return piece
+    if use_cache:
+        write_script_cache(SUMMARY_MODEL, prompt, summary)
+    return {'filename': piece['filename'], 'content': summary}
+
+def summarize_markdown_content(markdown_content, use_cache=True):
+    """Summarize every article concurrently; returns content pieces in the same order"""
+    model = get_model(SUMMARY_MODEL)
+    max_workers = min(SUMMARY_CONCURRENCY, len(markdown_content)) or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda piece: summarize_markdown_piece(model, piece, use_cache), markdown_content))
+
+def combine_markdown_content(markdown_content, max_chars=MAX_CONTENT_CHARS):
+    """Combine articles into a single string for analysis, truncated to max_chars.
+
+    Stops taking articles once the limit is passed, so articles that would
+    be cut off anyway are never copied into the joined string.
+    """
+    separator = "\n\n---\n\n"
+    parts = []
+    size = -len(separator)
+    for piece in markdown_content:
+        part = f"Article: {piece['filename']}\n{piece['content']}"
+        parts.append(part)
+        size += len(part) + len(separator)
+        if size > max_chars:
+            break
+    combined_content = separator.join(parts)
+    
+    # Truncate if too long (keeping within token limits)
+    if len(combined_content) > max_chars:
+        combined_content = combined_content[:max_chars] + TRUNCATION_MARKER
+    return combined_content
+
+def count_content_tokens(model_name, content, use_cache=True):
+    """Count the tokens in content for a model, caching the count on disk"""
+    cache_name = f"{model_name}:count_tokens"
+    cached = read_script_cache(cache_name, content) if use_cache else None
+    if cached is not None:
+        return int(cached)
+    total_tokens = get_model(model_name).count_tokens(content).total_tokens
+    write_script_cache(cache_name, content, str(total_tokens))
+    return total_tokens
+
+def fit_content_to_tokens(combined_content, model_name, max_tokens=MAX_CONTENT_TOKENS, use_cache=True):
+    """Truncate combined content to roughly max_tokens of the model's tokenizer"""
+    # A token almost never covers less than one character, so content this
+    # short can't be over the limit and needs no count_tokens call
+    if len(combined_content) <= max_tokens:
+        return combined_content
+    try:
+        total_tokens = count_content_tokens(model_name, combined_content, use_cache)
+    except Exception as e:
+        print(f"⚠️  Could not count tokens, estimating from length: {e}")
+        total_tokens = len(combined_content) / CHARS_PER_TOKEN
+    if total_tokens <= max_tokens:
+        return combined_content
+    # Keep a proportional share of the text, with 5% headroom for uneven
+    # token density across the content
+    keep_chars = int(len(combined_content) * max_tokens / total_tokens * 0.95)
+    return combined_content[:keep_chars] + TRUNCATION_MARKER
+
+def prepare_script_inputs(markdown_content, duration_minutes, model_name, use_cache=True):
+    """Combine the markdown content and size the script for the requested duration.
+
+    Returns (combined_content, target_words, max_tokens).
+    """
+    combined_content = fit_content_to_tokens(combine_markdown_content(markdown_content), model_name, use_cache=use_cache)
+    
+    # Calculate approximate word count target based on duration
+    # Average speaking rate is about 140-160 words per minute for conversational content
+    target_words = duration_minutes * 150  # Using 150 WPM as middle ground
+    
+    # Adjust max_tokens based on duration (rough estimate: 1 token ≈ 0.75 words)
+    max_tokens = min(8000, int(target_words * 1.5))  # Cap at 8000 tokens for API limits
+    
+    return combined_content, target_words, max_tokens
+
+def build_script_prompt(markdown_content, duration_minutes, style='legacy', use_cache=True):
+    """Build the script prompt for a style.
+
+    Returns (prompt, combined_content, target_words, max_tokens).
+    """
+    combined_content, target_words, max_tokens = prepare_script_inputs(
+        markdown_content, duration_minutes, SCRIPT_STYLES[style]['model'], use_cache)
+    prompt = SCRIPT_STYLES[style]['prompt'].format(
+        duration_minutes=duration_minutes,
+        combined_content=combined_content,
+        target_words=target_words
+    )
+    return prompt, combined_content, target_words, max_tokens
+
+def generate_podcast_script(markdown_content, duration_minutes=30, use_cache=True, style='legacy'):
+    """Generate a podcast script from markdown content using Gemini.
+
+    style defaults to 'legacy' ([SARAH]/[MICHAEL] on gemini-2.5-flash), the
+    format this function has always produced. parse_podcast_script and the
+    multi-speaker TTS only read [Speaker 0]/[Speaker 1] turns, so pass
+    style='multispeaker' for a script that feeds generate_podcast_audio.
+    """
+    script_style = SCRIPT_STYLES[style]
+    prompt, combined_content, target_words, max_tokens = build_script_prompt(markdown_content, duration_minutes, style, use_cache)
+
+    if use_cache:
+        cached = read_script_cache(script_style['model'], prompt)
+        if cached is not None:
+            print("Using cached podcast script")
+            return cached
+
+    model = get_model(script_style['model'])
+    try:
+        response = model.generate_content(
+            prompt,
+            generation_config=genai.GenerationConfig(
+                max_output_tokens=max_tokens,
+                temperature=script_style['temperature']
+            )
+        )
+        
+        # Check if response was blocked
+        if 'safer_prompt' in script_style and response.candidates and response.candidates[0].finish_reason == 2:
+            print("⚠️  Content was blocked by safety filters. Trying with adjusted prompt...")
+            # Try a simpler prompt
+            safer_prompt = script_style['safer_prompt'].format(
+                duration_minutes=duration_minutes,
+                content_summary=combined_content[:10000],
+                target_words=target_words
+            )
+            response = model.generate_content(
+                safer_prompt,
+                generation_config=genai.GenerationConfig(
+                    max_output_tokens=max_tokens,
+                    temperature=0.7
+                )
+            )
+        
+        # Only real responses are cached, never the fallback script below
+        if use_cache:
+            write_script_cache(script_style['model'], prompt, response.text)
+        return response.text
+    except Exception as e:
+        if style != 'multispeaker':
+            raise
+        print(f"Error generating podcast script: {e}")
+        # Return a fallback script
+        return FALLBACK_SCRIPT
+
+def stream_podcast_script(markdown_content, duration_minutes=30, use_cache=True, style='legacy'):
+    """Generate a podcast script like generate_podcast_script, yielding text as Gemini produces it.
+
+    Lets audio generation start on the first finished turns while the rest of
+    the script is still being written. There is no safety-filter retry or
+    fallback script here; a failed stream raises instead.
+    """
+    script_style = SCRIPT_STYLES[style]
+    prompt, _, _, max_tokens = build_script_prompt(markdown_content, duration_minutes, style, use_cache)
+
+    if use_cache:
+        cached = read_script_cache(script_style['model'], prompt)
+        if cached is not None:
+            print("Using cached podcast script")
+            yield cached
+            return
+
+    model = get_model(script_style['model'])
     response = model.generate_content(
         prompt,
         generation_config=genai.GenerationConfig(
             max_output_tokens=max_tokens,
-            temperature=0.7
-        )
+            temperature=script_style['temperature']
+        ),
+        stream=True
     )
-    
-    return response.text
+
+    pieces = []
+    for partial in response:
+        pieces.append(partial.text)
+        yield partial.text
+
+    if use_cache:
+        write_script_cache(script_style['model'], prompt, ''.join(pieces))
 
 def save_podcast_script(script, output_path):
-    """Save the podcast script to a file"""
+    """Save the podcast script to a file.
+
+    script may also be an iterable of text pieces (e.g. from
+    stream_podcast_script); each piece is written and flushed as it arrives.
+    """
+    if isinstance(script, str):
+        script = [script]
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(script)
+        for piece in script:
+            f.write(piece)
+            f.flush()
     print(f"Podcast script saved to: {output_path}")
 
 def main():
@@ -88,6 +402,14 @@ def main():
     parser.add_argument('--markdown_dir', type=str, required=True, help='Directory containing markdown files')
     parser.add_argument('--output', type=str, default='podcast_script.txt', help='Output file for podcast script')
     parser.add_argument('--duration', type=int, default=30, help='Podcast duration in minutes (default: 30)')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore cached scripts and call Gemini again')
+    parser.add_argument('--summarize', action='store_true',
+                        help='Summarize each article in parallel first, so large batches are covered without truncation')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write the script to the output file as Gemini produces it (no safety-filter retry or fallback script)')
+    parser.add_argument('--style', choices=list(SCRIPT_STYLES), default='legacy',
+                        help='Script format: legacy ([SARAH]/[MICHAEL], the default) or multispeaker '
+                             '([Speaker 0]/[Speaker 1], the format generate_podcast_audio.py reads)')
     args = parser.parse_args()
     
     # Check for Gemini API key
@@ -96,8 +418,6 @@ def main():
         print("Please set the GEMINI_API_KEY environment variable.")
         return
     
-    genai.configure(api_key=api_key)
-    
     # Read markdown files
     print(f"Reading markdown files from {args.markdown_dir}...")
     markdown_content = read_markdown_files(args.markdown_dir)
@@ -108,9 +428,16 @@ def main():
     
     print(f"Found {len(markdown_content)} markdown files.")
     
+    if args.summarize:
+        print(f"Summarizing {len(markdown_content)} articles...")
+        markdown_content = summarize_markdown_content(markdown_content, use_cache=not args.no_cache)
+    
     # Generate podcast script
     print(f"Generating {args.duration}-minute podcast script...")
-    script = generate_podcast_script(markdown_content, args.duration)
+    if args.stream:
+        script = stream_podcast_script(markdown_content, args.duration, use_cache=not args.no_cache, style=args.style)
+    else:
+        script = generate_podcast_script(markdown_content, args.duration, use_cache=not args.no_cache, style=args.style)
     
     # Save script
     save_podcast_script(script, args.output)
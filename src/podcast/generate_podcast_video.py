@@ -1,40 +1,63 @@
 import os
 import argparse
-from moviepy.editor import *
+import functools
+import subprocess
+import tempfile
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
-from pydub import AudioSegment
 import json
 
+# Arial locations to try before falling back to PIL's built-in font
+FONT_PATHS = ("/System/Library/Fonts/Arial.ttf", "arial.ttf")
+
+@functools.lru_cache(maxsize=16)
+def get_font(size):
+    """Load Arial at the given size once, fall back to default if not available"""
+    for path in FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+    return ImageFont.load_default()
+
+# Title slide length in seconds
+TITLE_SECONDS = 5
+
+# Speech detection: 30 ms frames of 16 kHz audio quieter than -40 dBFS count as
+# silence, and only silences of 300 ms or more split speech regions
+ANALYSIS_RATE = 16000
+SPEECH_FRAME_MS = 30
+SILENCE_THRESH_DB = -40
+MIN_SILENCE_MS = 300
+
+# Speaker changes snap to a silence at most this many seconds away
+MAX_SNAP_SECONDS = 2.0
+
+# Script line prefixes and the speaker they belong to; covers both the
+# legacy [SARAH]/[MICHAEL] and the multi-speaker [Speaker 0]/[Speaker 1] formats
+SCRIPT_PREFIXES = (
+    ('[SARAH]:', 'SARAH'),
+    ('[Speaker 0]', 'SARAH'),
+    ('[MICHAEL]:', 'MICHAEL'),
+    ('[Speaker 1]', 'MICHAEL'),
+    ('[PAUSE]', 'PAUSE'),
+)
+
 def create_simple_background(width=1920, height=1080, color=(45, 55, 70)):
     """Create a simple gradient background"""
-    img = Image.new('RGB', (width, height), color)
-    draw = ImageDraw.Draw(img)
-    
-    # Add subtle gradient effect
-    for y in range(height):
-        shade = int(color[0] + (20 * y / height))
-        shade = min(255, max(0, shade))
-        draw.line([(0, y), (width, y)], fill=(shade, shade + 10, shade + 25))
-    
-    return np.array(img)
+    # Add subtle gradient effect: build one column of row colours and
+    # broadcast it across the width instead of drawing a line per row
+    shade = np.clip((color[0] + 20 * np.arange(height) / height).astype(int), 0, 255)
+    rows = np.clip(np.stack([shade, shade + 10, shade + 25], axis=1), 0, 255).astype(np.uint8)
+    return np.broadcast_to(rows[:, None, :], (height, width, 3)).copy()
 
 def create_speaker_indicator(width=1920, height=1080, speaker_name="SARAH", active=True):
     """Create visual indicator for active speaker"""
     img = Image.new('RGB', (width, height), (45, 55, 70))
     draw = ImageDraw.Draw(img)
     
-    # Try to load a font, fall back to default if not available
-    try:
-        font_large = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 60)
-        font_small = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 40)
-    except:
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 60)
-            font_small = ImageFont.truetype("arial.ttf", 40)
-        except:
-            font_large = ImageFont.load_default()
-            font_small = ImageFont.load_default()
+    font_large = get_font(60)
+    font_small = get_font(40)
     
     # Colors for active/inactive states
     if active:
@@ -78,16 +101,8 @@ def create_title_slide(width=1920, height=1080, title="AI Podcast"):
     img = Image.new('RGB', (width, height), (30, 40, 60))
     draw = ImageDraw.Draw(img)
     
-    try:
-        font_title = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 80)
-        font_subtitle = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 40)
-    except:
-        try:
-            font_title = ImageFont.truetype("arial.ttf", 80)
-            font_subtitle = ImageFont.truetype("arial.ttf", 40)
-        except:
-            font_title = ImageFont.load_default()
-            font_subtitle = ImageFont.load_default()
+    font_title = get_font(80)
+    font_subtitle = get_font(40)
     
     # Title
     bbox = draw.textbbox((0, 0), title, font=font_title)
@@ -106,113 +121,186 @@ def create_title_slide(width=1920, height=1080, title="AI Podcast"):
 
 def parse_script_for_timing(script_path):
     """Parse script to determine speaker timing"""
-    with open(script_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
     segments = []
-    lines = content.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if line.startswith('[SARAH]:'):
-            segments.append({
-                'speaker': 'SARAH',
-                'text': line.replace('[SARAH]:', '').strip(),
-                'estimated_duration': len(line.replace('[SARAH]:', '').strip()) * 0.05  # rough estimate
-            })
-        elif line.startswith('[MICHAEL]:'):
-            segments.append({
-                'speaker': 'MICHAEL', 
-                'text': line.replace('[MICHAEL]:', '').strip(),
-                'estimated_duration': len(line.replace('[MICHAEL]:', '').strip()) * 0.05
-            })
-        elif line.startswith('[PAUSE]'):
-            segments.append({
-                'speaker': 'PAUSE',
-                'estimated_duration': 1.0
-            })
+    
+    # Stream the file line by line; each line is matched against the prefix
+    # table once and stops at the first hit
+    with open(script_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            for prefix, speaker in SCRIPT_PREFIXES:
+                if not line.startswith(prefix):
+                    continue
+                if speaker == 'PAUSE':
+                    segments.append({'speaker': 'PAUSE'})
+                else:
+                    text = line[len(prefix):].lstrip(': ').strip()
+                    segments.append({'speaker': speaker, 'text': text})
+                break
     
     return segments
 
+def merge_speaker_segments(segments):
+    """Merge consecutive segments from the same speaker into one"""
+    merged = []
+    for segment in segments:
+        if merged and merged[-1]['speaker'] == segment['speaker']:
+            previous = merged[-1]
+            if 'text' in segment:
+                previous['text'] = f"{previous['text']} {segment['text']}"
+        else:
+            merged.append(dict(segment))
+    return merged
+
+def analyze_audio(audio_path):
+    """Return the audio's duration and the (start, end) times of its non-silent stretches"""
+    # Decode once to 16 kHz mono PCM; the sample count gives the duration and
+    # frame energy is all speech detection needs
+    result = subprocess.run([
+        'ffmpeg', '-loglevel', 'error', '-i', audio_path,
+        '-f', 's16le', '-ac', '1', '-ar', str(ANALYSIS_RATE), '-',
+    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors='replace').strip())
+    
+    samples = np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768
+    duration = len(samples) / ANALYSIS_RATE
+    frame_len = ANALYSIS_RATE * SPEECH_FRAME_MS // 1000
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return duration, []
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    voiced = 20 * np.log10(np.maximum(rms, 1e-10)) > SILENCE_THRESH_DB
+    
+    # Runs of voiced frames, with gaps shorter than MIN_SILENCE_MS bridged
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], voiced, [False]))))
+    min_gap = MIN_SILENCE_MS // SPEECH_FRAME_MS
+    regions = []
+    for start, end in zip(edges[0::2], edges[1::2]):
+        if regions and start - regions[-1][1] < min_gap:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+    
+    frame_seconds = SPEECH_FRAME_MS / 1000
+    return duration, [(float(start * frame_seconds), float(end * frame_seconds)) for start, end in regions]
+
+def time_segments_to_audio(segments, regions, audio_duration):
+    """Give each speaker segment a start and end time in the audio
+
+    Turns are spread over the detected speech in proportion to their text
+    length, and each boundary is moved to the nearest silence between speech
+    regions so slides change when the voice does.
+    """
+    if not segments:
+        return []
+    if not regions:
+        regions = [(0.0, audio_duration)]
+    
+    starts = np.array([start for start, _ in regions])
+    lengths = np.array([end - start for start, end in regions])
+    speech_end = np.cumsum(lengths)
+    gaps = np.array([(prev_end + start) / 2 for (_, prev_end), (start, _) in zip(regions, regions[1:])])
+    
+    weights = np.cumsum([max(1, len(segment['text'])) for segment in segments])
+    timed = []
+    start = 0.0
+    for segment, weight in zip(segments, weights):
+        if weight == weights[-1]:
+            end = audio_duration
+        else:
+            # Map this share of the speech onto the audio timeline
+            speech_time = weight / weights[-1] * speech_end[-1]
+            i = min(np.searchsorted(speech_end, speech_time), len(regions) - 1)
+            end = starts[i] + speech_time - (speech_end[i] - lengths[i])
+            if len(gaps):
+                nearest = gaps[np.argmin(np.abs(gaps - end))]
+                if abs(nearest - end) <= MAX_SNAP_SECONDS:
+                    end = nearest
+            end = max(start, end)
+        if end > start:
+            timed.append(dict(segment, start=start, end=end))
+        start = end
+    return timed
+
 def create_podcast_video(audio_path, script_path, output_path):
     """Create podcast video with audio and simple visuals"""
-    print("Loading audio file...")
+    print("Analyzing audio file...")
     
-    # Load audio
+    # A single decode gives both the duration and where the speech is
     try:
-        audio_clip = AudioFileClip(audio_path)
-        audio_duration = audio_clip.duration
+        audio_duration, regions = analyze_audio(audio_path)
         print(f"Audio duration: {audio_duration:.2f} seconds")
-    except Exception as e:
+    except (OSError, RuntimeError) as e:
         print(f"Error loading audio: {e}")
         return False
     
-    # Parse script for timing
+    # Parse script for speaker order; pauses are just silence in the audio
     print("Parsing script for speaker timing...")
-    segments = parse_script_for_timing(script_path)
+    segments = merge_speaker_segments(
+        segment for segment in parse_script_for_timing(script_path)
+        if segment['speaker'] != 'PAUSE'
+    )
     
-    # Create visual clips
-    clips = []
-    current_time = 0
+    # Time the speaker turns from where speech actually is in the audio
+    segments = time_segments_to_audio(segments, regions, audio_duration)
     
-    # Title slide (5 seconds)
+    # Every segment shows one of a few fixed frames, so render each once as a
+    # PNG and let ffmpeg hold it for the segment's duration
     print("Creating title slide...")
-    title_frame = create_title_slide()
-    title_clip = ImageClip(title_frame, duration=5)
-    clips.append(title_clip.set_start(0))
-    current_time = 5
+    frames = {
+        'title': create_title_slide(),
+        'SARAH': create_speaker_indicator(speaker_name='SARAH', active=True),
+        'MICHAEL': create_speaker_indicator(speaker_name='MICHAEL', active=True),
+        'background': create_simple_background(),
+    }
     
-    # Create speaker clips based on script timing
+    # Title slide over the first 5 seconds of audio, then each speaker turn
+    # until it ends; slides are (frame, end time) pairs
     print("Creating speaker visual segments...")
-    for i, segment in enumerate(segments):
-        if segment['speaker'] in ['SARAH', 'MICHAEL']:
-            duration = max(2.0, segment['estimated_duration'])  # Minimum 2 seconds per segment
-            
-            # Create active speaker visual
-            active_frame = create_speaker_indicator(speaker_name=segment['speaker'], active=True)
-            speaker_clip = ImageClip(active_frame, duration=duration)
-            clips.append(speaker_clip.set_start(current_time))
-            
-            current_time += duration
-            
-        elif segment['speaker'] == 'PAUSE':
-            # Show neutral background during pauses
-            bg_frame = create_simple_background()
-            pause_clip = ImageClip(bg_frame, duration=segment['estimated_duration'])
-            clips.append(pause_clip.set_start(current_time))
-            
-            current_time += segment['estimated_duration']
-    
-    # If video is shorter than audio, extend with final background
-    if current_time < audio_duration:
-        remaining_duration = audio_duration - current_time
-        final_frame = create_simple_background()
-        final_clip = ImageClip(final_frame, duration=remaining_duration)
-        clips.append(final_clip.set_start(current_time))
-    
-    print(f"Creating composite video with {len(clips)} visual segments...")
-    
-    # Composite all clips
-    video = CompositeVideoClip(clips, size=(1920, 1080))
-    
-    # Set the audio
-    final_video = video.set_audio(audio_clip)
-    
-    # Write the video file
-    print(f"Rendering video to {output_path}...")
-    final_video.write_videofile(
-        output_path,
-        fps=24,
-        codec='libx264',
-        audio_codec='aac',
-        temp_audiofile='temp-audio.m4a',
-        remove_temp=True
-    )
+    title_end = min(TITLE_SECONDS, audio_duration)
+    slides = [('title', title_end)]
+    for segment in segments:
+        if segment['end'] > title_end:
+            slides.append((segment['speaker'], segment['end']))
+    if not segments:
+        slides.append(('background', audio_duration))
+    
+    print(f"Creating slideshow with {len(slides)} visual segments...")
     
-    # Clean up
-    audio_clip.close()
-    video.close()
-    final_video.close()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, frame in frames.items():
+            Image.fromarray(frame).save(os.path.join(tmpdir, f"{name}.png"))
+        
+        # ffmpeg concat demuxer list; the last file is repeated because the
+        # demuxer ignores the duration of the final entry
+        list_path = os.path.join(tmpdir, 'slides.txt')
+        with open(list_path, 'w') as f:
+            start = 0.0
+            for name, end in slides:
+                # Durations come from rounded end times so errors don't add up
+                end = round(end, 3)
+                f.write(f"file '{name}.png'\nduration {end - start:.3f}\n")
+                start = end
+            f.write(f"file '{slides[-1][0]}.png'\n")
+        
+        # Static slides: x264 tuned for still images, with the audio muxed in
+        # directly, so no frame ever passes through Python
+        print(f"Rendering video to {output_path}...")
+        result = subprocess.run([
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-i', audio_path,
+            '-c:v', 'libx264', '-preset', 'veryfast', '-tune', 'stillimage',
+            '-pix_fmt', 'yuv420p', '-r', '24',
+            '-c:a', 'aac', '-shortest',
+            output_path,
+        ], stderr=subprocess.PIPE, text=True)
+    
+    if result.returncode != 0:
+        print(f"Error rendering video: {result.stderr.strip()}")
+        return False
     
     print("Video generation complete!")
     return True
@@ -1,48 +1,65 @@
 import argparse
 import os
-import base64
+import binascii
+import hashlib
+import importlib
+import random
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from pathlib import Path
 # Add parent directory to path for imports
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scripts.email.fetch_gmail_by_sender import authenticate_gmail, fetch_message_ids
-from scripts.email.filter_subjects_with_llm import fetch_subject, ask_llm
+from scripts.email.fetch_gmail_by_sender import MAX_RESULTS, authenticate_gmail, build_gmail_service, fetch_message_ids, load_credentials
+from scripts.email.filter_subjects_with_llm import ask_llm_many, ask_llm_semantic
 from scripts.email.download_eml_files import download_eml
-from scripts.email.eml_to_markdown import convert_all_eml_to_markdown
-# Try to import v2 versions first for better NotebookLM-style output
-try:
-    from scripts.podcast.generate_podcast_script_v2 import read_markdown_files, generate_podcast_script, save_podcast_script
-    print("Using improved podcast script generator (v2)")
-except ImportError:
-    try:
-        from scripts.podcast.generate_podcast_script import read_markdown_files, generate_podcast_script, save_podcast_script
-        print("Using standard podcast script generator")
-    except ImportError:
-        from generate_podcast_script import read_markdown_files, generate_podcast_script, save_podcast_script
-        print("Using standard podcast script generator (legacy path)")
-
-try:
-    from scripts.podcast.generate_podcast_audio import parse_podcast_script, create_podcast_audio, combine_audio_segments
-    print("Using multi-speaker podcast audio generator")
-except ImportError:
-    from generate_podcast_audio import parse_podcast_script, create_podcast_audio, combine_audio_segments
-    print("Using multi-speaker podcast audio generator (legacy path)")
-from google import genai
-try:
-    from scripts.podcast.generate_podcast_video import create_podcast_video
-    HAS_VIDEO = True
-except ImportError:
-    try:
-        from generate_podcast_video import create_podcast_video
-        HAS_VIDEO = True
-    except ImportError:
-        HAS_VIDEO = False
-        print("Warning: moviepy not installed. Video generation will be skipped.")
+from scripts.email.eml_to_markdown import convert_all_eml_to_markdown, convert_eml_file, create_conversion_pool
+
+# Podcast modules are looked up in the scripts.podcast package first, then
+# directly on the path (legacy layout)
+PODCAST_MODULE_PATHS = ('scripts.podcast.{}', '{}')
+
+def import_podcast_module(name):
+    """Import a podcast module from the first layout that has it.
+
+    Only a missing candidate module falls through to the next layout; an
+    import error raised inside the module itself is reported as is.
+    """
+    for path in PODCAST_MODULE_PATHS:
+        module_name = path.format(name)
+        try:
+            return importlib.import_module(module_name)
+        except ModuleNotFoundError as e:
+            # e.name is the module that wasn't found: the candidate or a parent package
+            if not e.name or not (module_name == e.name or module_name.startswith(f"{e.name}.")):
+                raise
+    raise ModuleNotFoundError(f"No module named {name!r} in {', '.join(path.format(name) for path in PODCAST_MODULE_PATHS)}", name=name)
+
+# Spawned Markdown conversion workers (macOS, Windows) re-import this script
+# as __mp_main__ and only need eml_to_markdown, so skip the podcast modules
+if __name__ != '__mp_main__':
+    script_module = import_podcast_module('generate_podcast_script')
+    read_markdown_files = script_module.read_markdown_files
+    generate_podcast_script = script_module.generate_podcast_script
+    save_podcast_script = script_module.save_podcast_script
+    stream_podcast_script = script_module.stream_podcast_script
+    summarize_markdown_content = script_module.summarize_markdown_content
+    FALLBACK_SCRIPT = script_module.FALLBACK_SCRIPT
+    print(f"Using podcast script generator ({script_module.__name__})")
+
+    audio_module = import_podcast_module('generate_podcast_audio')
+    parse_podcast_script = audio_module.parse_podcast_script
+    create_podcast_audio = audio_module.create_podcast_audio
+    combine_audio_segments = audio_module.combine_audio_segments
+    generate_multispeaker_podcast = audio_module.generate_multispeaker_podcast
+    stream_transcript_chunks = audio_module.stream_transcript_chunks
+    print(f"Using multi-speaker podcast audio generator ({audio_module.__name__})")
 import google.generativeai as genai
 from dotenv import load_dotenv
-from googleapiclient.errors import HttpError
 load_dotenv()
 
 # Preset sender groups for convenience
@@ -78,12 +95,44 @@ SENDER_PRESETS = {
     'all': []  # Will be populated with all unique senders
 }
 
-# Populate 'all' preset with unique senders
-all_senders = set()
-for preset_senders in SENDER_PRESETS.values():
-    if preset_senders:  # Skip the empty 'all' list
-        all_senders.update(preset_senders)
-SENDER_PRESETS['all'] = sorted(list(all_senders))
+# Populate 'all' preset with unique senders ('all' itself is still empty here)
+SENDER_PRESETS['all'] = sorted({sender for preset_senders in SENDER_PRESETS.values() for sender in preset_senders})
+
+# Translates URL-safe base64 (as used by Gmail) to the standard alphabet
+URLSAFE_B64_TABLE = bytes.maketrans(b'-_', b'+/')
+
+# Base64 characters decoded per step when only a preview of a body is needed
+# (a multiple of 4, so every step ends on a whole base64 group)
+BODY_DECODE_CHUNK = 4096
+
+# Gmail accepts up to 100 calls per batch request, but every call in a batch
+# counts against the per-user concurrency limit, and at 50 rate-limit (429)
+# replies are common, so stay well below that
+GMAIL_BATCH_SIZE = 25
+
+# Batched gets that fail with these statuses (or a 403 rate-limit reply) are
+# retried with exponential backoff before the message is given up on
+GMAIL_RETRY_STATUSES = {429, 500, 502, 503, 504}
+GMAIL_MAX_RETRIES = 4
+
+# Fields message_subject and message_body read from a format='full' message
+BODY_PREVIEW_FIELDS = 'payload(headers(name,value),body/data,parts(mimeType,body/data))'
+
+# Most message IDs messages.batchModify accepts per call
+BATCH_MODIFY_SIZE = 1000
+
+# Parallel .eml downloads; each is an independent HTTPS call, so the limit is
+# Gmail's per-user rate rather than CPU
+DOWNLOAD_WORKERS = 8
+
+# Concurrent batched LLM filter calls; the pool size also caps requests in flight
+LLM_FILTER_WORKERS = 8
+
+# Per-thread Gmail services for the download workers
+_thread_local = threading.local()
+
+# YYYYMMDD, YYYY/MM/DD, YYYY-MM-DD, YYYY.MM.DD or YYYY MM DD
+DATE_RE = re.compile(r'([0-9]{4})([-/. ]?)([0-9]{2})\2([0-9]{2})')
 
 def parse_date(date_str):
     """Parse date from various formats to YYYY/MM/DD format required by Gmail API"""
@@ -93,7 +142,18 @@ def parse_date(date_str):
     # Remove any extra whitespace
     date_str = date_str.strip()
     
-    # Try different date formats
+    # Common case: four-digit year, two-digit month and day, one consistent
+    # separator (or none); validated without raising through strptime
+    match = DATE_RE.fullmatch(date_str)
+    if match:
+        year, _, month, day = match.groups()
+        try:
+            datetime(int(year), int(month), int(day))
+            return f"{year}/{month}/{day}"
+        except ValueError:
+            pass
+    
+    # Fall back to strptime for anything looser, e.g. single-digit months
     formats = [
         "%Y%m%d",      # YYYYMMDD
         "%Y/%m/%d",    # YYYY/MM/DD
@@ -114,11 +174,14 @@ def parse_date(date_str):
     print(f"Warning: Could not parse date '{date_str}', using as-is")
     return date_str
 
+# Deletes the separators allowed in --after/--before dates in one pass
+DATE_SEPARATORS = str.maketrans('', '', '/-. ')
+
 def generate_dir_names(after_date, before_date):
     """Generate default directory names based on date range"""
     # Parse dates to get clean format
-    after_clean = after_date.replace("/", "").replace("-", "").replace(".", "").replace(" ", "") if after_date else ""
-    before_clean = before_date.replace("/", "").replace("-", "").replace(".", "").replace(" ", "") if before_date else ""
+    after_clean = after_date.translate(DATE_SEPARATORS) if after_date else ""
+    before_clean = before_date.translate(DATE_SEPARATORS) if before_date else ""
     
     if after_clean and before_clean:
         dir_suffix = f"{after_clean}_{before_clean}"
@@ -135,35 +198,118 @@ def generate_dir_names(after_date, before_date):
         'markdown': f"{dir_suffix}_markdown"
     }
 
-def fetch_body(service, msg_id):
-    try:
-        msg = service.users().messages().get(userId='me', id=msg_id, format='full').execute()
-        payload = msg.get('payload', {})
-        parts = payload.get('parts', [])
-        # Try to find the text/plain part
-        if parts:
-            for part in parts:
-                if part.get('mimeType') == 'text/plain':
-                    data = part.get('body', {}).get('data')
-                    if data:
-                        import base64
-                        decoded = base64.urlsafe_b64decode(data).decode('utf-8', errors='replace')
-                        return decoded
-        # Fallback: try the main body
-        body_data = payload.get('body', {}).get('data')
-        if body_data:
-            import base64
-            decoded = base64.urlsafe_b64decode(body_data).decode('utf-8', errors='replace')
-            return decoded
-        return ''
-    except HttpError as e:
-        print(f"Failed to fetch body for {msg_id}: {e}")
-        return ''
-
-def fetch_and_filter_ids(service, senders, after, before, filter_description, temp_dir, skip_llm_filter, llm_filter_on_body):
+def is_retryable_gmail_error(error):
+    """True for rate-limit and transient server errors worth retrying"""
+    status = getattr(error, 'status_code', None)
+    return status in GMAIL_RETRY_STATUSES or (status == 403 and 'ratelimitexceeded' in str(error).lower())
+
+def fetch_messages(service, msg_ids, **get_args):
+    """Fetch many messages with batched Gmail requests; returns {msg_id: message}.
+
+    Gets that fail with a rate-limit or transient server error are retried
+    with backoff; messages still failing after GMAIL_MAX_RETRIES are left
+    out, and how many were lost is reported.
+    """
+    messages = {}
+    errors = {}
+    
+    def collect(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = exception
+        else:
+            messages[request_id] = response
+    
+    pending = list(msg_ids)
+    for attempt in range(GMAIL_MAX_RETRIES + 1):
+        # One HTTP round-trip per GMAIL_BATCH_SIZE messages instead of one each
+        for start in range(0, len(pending), GMAIL_BATCH_SIZE):
+            chunk = pending[start:start + GMAIL_BATCH_SIZE]
+            batch = service.new_batch_http_request(callback=collect)
+            for msg_id in chunk:
+                batch.add(service.users().messages().get(userId='me', id=msg_id, **get_args), request_id=msg_id)
+            try:
+                batch.execute()
+            except Exception as e:
+                # The whole batch request was rejected, e.g. rate limited
+                if not is_retryable_gmail_error(e):
+                    raise
+                errors.update(dict.fromkeys(chunk, e))
+        
+        pending = [msg_id for msg_id, error in errors.items() if is_retryable_gmail_error(error)]
+        if not pending or attempt == GMAIL_MAX_RETRIES:
+            break
+        delay = 2 ** attempt + random.random()
+        print(f"⚠️  {len(pending)} message fetch(es) rate limited or failed, retrying in {delay:.1f}s...")
+        time.sleep(delay)
+        for msg_id in pending:
+            del errors[msg_id]
+    
+    if errors:
+        print(f"⚠️  Could not fetch {len(errors)} of {len(msg_ids)} messages; they are left out of filtering:")
+        for msg_id, error in errors.items():
+            print(f"   {msg_id}: {error}")
+    return messages
+
+def message_subject(msg):
+    """Return the Subject header of a fetched message"""
+    for header in msg.get('payload', {}).get('headers', []):
+        if header['name'].lower() == 'subject':
+            return header['value']
+    return ''
+
+def decode_body_data(data, max_lines=None):
+    """Decode a Gmail body part (URL-safe base64, padding optional) to text.
+
+    With max_lines, decoding stops once that many lines are complete, so a
+    large newsletter isn't decoded in full for a short preview.
+    """
+    encoded = data.encode('ascii').translate(URLSAFE_B64_TABLE)
+    if max_lines is None:
+        # Over-pad: binascii stops at the first complete padding, so no
+        # length fix-up is needed
+        return binascii.a2b_base64(encoded + b'==').decode('utf-8', errors='replace')
+    
+    decoded = bytearray()
+    newlines = 0
+    for start in range(0, len(encoded), BODY_DECODE_CHUNK):
+        chunk = binascii.a2b_base64(encoded[start:start + BODY_DECODE_CHUNK] + b'==')
+        decoded += chunk
+        newlines += chunk.count(b'\n')
+        if newlines >= max_lines:
+            break
+    text = decoded.decode('utf-8', errors='replace')
+    return '\n'.join(text.splitlines()[:max_lines])
+
+def message_body(msg, max_lines=None):
+    """Return the text/plain body of a message fetched with format='full'"""
+    payload = msg.get('payload', {})
+    parts = payload.get('parts', [])
+    # Try to find the text/plain part
+    if parts:
+        for part in parts:
+            if part.get('mimeType') == 'text/plain':
+                data = part.get('body', {}).get('data')
+                if data:
+                    return decode_body_data(data, max_lines)
+    # Fallback: try the main body
+    body_data = payload.get('body', {}).get('data')
+    if body_data:
+        return decode_body_data(body_data, max_lines)
+    return ''
+
+def prefilter_subject(subject, keep_re, drop_re):
+    """Decide a subject by pattern: False if it matches drop_re, True if it
+    matches keep_re, None to leave it to the LLM"""
+    if drop_re and drop_re.search(subject):
+        return False
+    if keep_re and keep_re.search(subject):
+        return True
+    return None
+
+def fetch_and_filter_ids(service, senders, after, before, filter_description, temp_dir, skip_llm_filter, llm_filter_on_body, use_cache=True, semantic_cache=False, keep_pattern=None, drop_pattern=None, subject_keywords=None, max_results=MAX_RESULTS):
     # Step 1: Fetch message IDs
     print("Fetching message IDs from Gmail...")
-    message_ids = fetch_message_ids(service, senders, after=after, before=before)
+    message_ids = fetch_message_ids(service, senders, after=after, before=before, subject_keywords=subject_keywords, max_results=max_results)
     print(f"Fetched {len(message_ids)} message IDs.")
     if skip_llm_filter:
         print("Skipping LLM filtering. All fetched message IDs will be used.")
@@ -174,100 +320,243 @@ def fetch_and_filter_ids(service, senders, after, before, filter_description, te
             print("LLM filtering on subject and first 20 lines of body...")
         else:
             print("LLM filtering on subject only...")
-        relevant_ids = []
-        for i, msg_id in enumerate(message_ids, 1):
-            subject = fetch_subject(service, msg_id)
+        # Partial responses: only the headers and part bodies that
+        # message_subject and message_body read, not the rest of the message
+        if llm_filter_on_body:
+            messages = fetch_messages(service, message_ids, format='full', fields=BODY_PREVIEW_FIELDS)
+        else:
+            messages = fetch_messages(
+                service, message_ids, format='metadata', metadataHeaders=['Subject'],
+                fields='payload/headers'
+            )
+        candidates = []
+        for msg_id in message_ids:
+            msg = messages.get(msg_id)
+            if msg is None:
+                continue
+            subject = message_subject(msg)
             if not subject:
                 continue
             body_lines = ''
             if llm_filter_on_body:
-                body = fetch_body(service, msg_id)
-                body_lines = '\n'.join(body.splitlines()[:20])
+                body_lines = message_body(msg, max_lines=20)
             prompt = None
             if llm_filter_on_body:
                 prompt = f"Subject: {subject}\n\nFirst 20 lines of email body:\n{body_lines}"
             else:
                 prompt = subject
-            keep = ask_llm(prompt, filter_description)
-            print(f"[{i}/{len(message_ids)}] Subject: {subject}\nKeep: {keep}\n---")
+            candidates.append((msg_id, subject, prompt))
+        
+        # Uncached emails are classified FILTER_BATCH_SIZE per call, with the
+        # calls made concurrently; results stay in message order for the log
+        def decide(prompts):
+            return ask_llm_many(prompts, filter_description, use_cache, LLM_FILTER_WORKERS)
+        
+        # Subjects matching --drop_pattern or --keep_pattern are decided
+        # without the model; only the rest are sent to it
+        keep_re = re.compile(keep_pattern, re.IGNORECASE) if keep_pattern else None
+        drop_re = re.compile(drop_pattern, re.IGNORECASE) if drop_pattern else None
+        keeps = [prefilter_subject(subject, keep_re, drop_re) for _, subject, _ in candidates]
+        undecided = [i for i, keep in enumerate(keeps) if keep is None]
+        if len(undecided) < len(candidates):
+            print(f"Decided {len(candidates) - len(undecided)} subjects by pattern without the LLM.")
+        
+        prompts = [candidates[i][2] for i in undecided]
+        if semantic_cache and use_cache and prompts:
+            decided = ask_llm_semantic(prompts, filter_description, decide)
+        else:
+            decided = decide(prompts)
+        for i, keep in zip(undecided, decided):
+            keeps[i] = keep
+        
+        relevant_ids = []
+        for i, ((msg_id, subject, _), keep) in enumerate(zip(candidates, keeps), 1):
+            print(f"[{i}/{len(candidates)}] Subject: {subject}\nKeep: {keep}\n---")
             if keep:
                 relevant_ids.append(msg_id)
         print(f"Filtered down to {len(relevant_ids)} relevant message IDs.")
-    # Save to temp file for next step
-    temp_path = os.path.join(temp_dir, 'pipeline_filtered_message_ids.txt')
-    with open(temp_path, 'w') as f:
-        for mid in relevant_ids:
-            f.write(mid + '\n')
+    # The IDs are returned directly; they're also written to a file in
+    # temp_dir only when one is given (--dump_ids)
+    temp_path = None
+    if temp_dir:
+        temp_path = os.path.join(temp_dir, 'pipeline_filtered_message_ids.txt')
+        with open(temp_path, 'w') as f:
+            f.write(''.join(f'{mid}\n' for mid in relevant_ids))
     return relevant_ids, temp_path
 
-def download_emls(service, msg_ids, out_dir, mark_processed=False):
-    os.makedirs(out_dir, exist_ok=True)
-    for i, msg_id in enumerate(msg_ids, 1):
-        out_path = os.path.join(out_dir, f'{msg_id}.eml')
-        if os.path.exists(out_path):
-            print(f"[{i}/{len(msg_ids)}] {msg_id}.eml already exists, skipping.")
-            continue
-        print(f"[{i}/{len(msg_ids)}] Downloading {msg_id}.eml ...", end=' ')
-        success = download_eml(service, msg_id, out_dir)
-        if success:
-            print("Done.", end='')
-            
-            # Mark as read and archive if requested
-            if mark_processed:
-                print(" Marking as read and archiving...", end=' ')
-                try:
-                    # Mark as read by removing UNREAD label and archive by removing INBOX label
-                    service.users().messages().modify(
-                        userId='me',
-                        id=msg_id,
-                        body={'removeLabelIds': ['UNREAD', 'INBOX']}
-                    ).execute()
-                    print("Done.")
-                except Exception as e:
-                    print(f"Failed: {e}")
-            else:
-                print()
-        else:
-            print("Failed.")
+def init_download_worker(creds):
+    """Give a download thread its own Gmail service (service objects aren't thread-safe)"""
+    _thread_local.gmail_service = build_gmail_service(creds)
+
+def download_message(msg_id, out_dir):
+    """Download one message on the current thread's service"""
+    return download_eml(_thread_local.gmail_service, msg_id, out_dir)
 
-def generate_podcast_from_markdown(md_outdir, output_dir="podcast_output", duration_minutes=30):
-    """Generate podcast script, audio, and video from markdown files"""
-    os.makedirs(output_dir, exist_ok=True)
+def mark_messages_processed(service, msg_ids):
+    """Mark messages as read and archive them, up to BATCH_MODIFY_SIZE per call"""
+    for start in range(0, len(msg_ids), BATCH_MODIFY_SIZE):
+        chunk = msg_ids[start:start + BATCH_MODIFY_SIZE]
+        try:
+            # Mark as read by removing UNREAD label and archive by removing INBOX label
+            service.users().messages().batchModify(
+                userId='me',
+                body={'ids': chunk, 'removeLabelIds': ['UNREAD', 'INBOX']}
+            ).execute()
+            print(f"Marked {len(chunk)} messages as read and archived.")
+        except Exception as e:
+            print(f"⚠️  Marking {len(chunk)} messages as read and archiving failed: {e}")
+
+def download_emls(service, msg_ids, out_dir, mark_processed=False, workers=DOWNLOAD_WORKERS, md_dir=None):
+    """Download messages as .eml files, several at a time.
+
+    Each worker thread builds its own Gmail service, and keeps its connection,
+    from credentials loaded once here, so `service` is not shared with them;
+    it is only used afterwards to mark the downloaded messages processed in
+    bulk. With md_dir, each downloaded file is converted to Markdown on a
+    separate thread while the remaining downloads continue.
+    Returns the set of .eml filenames converted that way.
+    """
+    # One directory listing instead of a stat per message
+    existing = {name for name in os.listdir(out_dir) if name.endswith('.eml')}
+    pending = [msg_id for msg_id in msg_ids if f'{msg_id}.eml' not in existing]
+    skipped = len(msg_ids) - len(pending)
+    if skipped:
+        print(f"{skipped} .eml files already exist, skipping.")
+    if not pending:
+        return set()
     
+    conversions = {}
+    downloaded_ids = []
+    creds = load_credentials()
+    print(f"Downloading {len(pending)} messages with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=1) as converter, \
+         ThreadPoolExecutor(max_workers=max(1, workers), initializer=init_download_worker, initargs=(creds,)) as executor:
+        futures = {
+            executor.submit(download_message, msg_id, out_dir): msg_id
+            for msg_id in pending
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            downloaded = future.result()
+            filename = f"{futures[future]}.eml"
+            print(f"[{i}/{len(pending)}] {filename} {'Done.' if downloaded else 'Failed.'}")
+            if downloaded:
+                downloaded_ids.append(futures[future])
+                if md_dir:
+                    conversions[filename] = converter.submit(convert_eml_file, out_dir, filename, md_dir)
+        if mark_processed and downloaded_ids:
+            mark_messages_processed(service, downloaded_ids)
+    # Surface any conversion error, as the serial conversion did
+    for conversion in conversions.values():
+        conversion.result()
+    return set(conversions)
+
+def markdown_fingerprint(md_outdir, duration_minutes, summarize):
+    """Hash the markdown files' names, sizes and mtimes plus the script settings"""
+    if os.path.isdir(md_outdir):
+        with os.scandir(md_outdir) as entries:
+            files = sorted(
+                (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                for entry in entries if entry.name.endswith('.md') and entry.is_file()
+            )
+    else:
+        files = []
+    return hashlib.sha256(repr((files, duration_minutes, summarize)).encode('utf-8')).hexdigest()
+
+def read_fingerprint(path):
+    """Return the fingerprint saved with the last script, or None"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip()
+
+def write_fingerprint(path, fingerprint):
+    with open(path, 'w') as f:
+        f.write(fingerprint)
+
+def load_video_generator():
+    """Import the video generator only when a podcast is made; None if Pillow is missing"""
+    try:
+        return import_podcast_module('generate_podcast_video').create_podcast_video
+    except ImportError:
+        print("Warning: Pillow not installed. Video generation will be skipped.")
+        return None
+
+def generate_podcast_from_markdown(md_outdir, output_dir="podcast_output", duration_minutes=30, stream_audio=False, summarize=False, use_cache=True):
+    """Generate podcast script, audio, and video from markdown files.
+
+    With use_cache=False the script, summaries and audio are all generated
+    afresh, ignoring the fingerprint and every on-disk cache.
+    """
     script_path = os.path.join(output_dir, "podcast_script.txt")
     audio_path = os.path.join(output_dir, "podcast.mp3")
     video_path = os.path.join(output_dir, "podcast_video.mp4")
     
-    # Step 1: Generate podcast script
-    print(f"Generating {duration_minutes}-minute podcast script...")
-    markdown_content = read_markdown_files(md_outdir)
-    if not markdown_content:
-        print("No markdown files found for podcast generation.")
-        return False
+    # Skip reading the articles and writing the script when nothing that
+    # feeds the script has changed since it was last written
+    fingerprint = markdown_fingerprint(md_outdir, duration_minutes, summarize)
+    fingerprint_path = os.path.join(output_dir, ".fingerprint")
+    reuse_script = use_cache and os.path.exists(script_path) and read_fingerprint(fingerprint_path) == fingerprint
     
-    script = generate_podcast_script(markdown_content, duration_minutes)
-    save_podcast_script(script, script_path)
+    if reuse_script:
+        print(f"Markdown unchanged since the last run, reusing {script_path}")
+    else:
+        markdown_content = read_markdown_files(md_outdir)
+        if not markdown_content:
+            print("No markdown files found for podcast generation.")
+            return False
+        
+        if summarize:
+            print(f"Summarizing {len(markdown_content)} articles...")
+            markdown_content = summarize_markdown_content(markdown_content, use_cache)
     
-    # Step 2: Generate audio
-    print("Generating podcast audio...")
-    try:
-        segments = parse_podcast_script(script_path)
-        audio_segments = create_podcast_audio(segments, os.path.join(output_dir, "audio_segments"))
+    if stream_audio and not reuse_script:
+        # Steps 1 & 2 overlapped: TTS starts on the first finished turns while
+        # Gemini is still writing the rest of the script
+        print(f"Generating {duration_minutes}-minute podcast script and audio together...")
+        script_pieces = []
+        
+        def record_script():
+            for piece in stream_podcast_script(markdown_content, duration_minutes, use_cache, style='multispeaker'):
+                script_pieces.append(piece)
+                yield piece
+        
+        success = generate_multispeaker_podcast(stream_transcript_chunks(record_script()), audio_path, use_cache=use_cache)
+        if not success:
+            print("Failed to generate podcast audio.")
+            return False
+        save_podcast_script(''.join(script_pieces), script_path)
+        write_fingerprint(fingerprint_path, fingerprint)
+    else:
+        # Step 1: Generate podcast script
+        if not reuse_script:
+            print(f"Generating {duration_minutes}-minute podcast script...")
+            script = generate_podcast_script(markdown_content, duration_minutes, use_cache, style='multispeaker')
+            save_podcast_script(script, script_path)
+            # The fallback script is never pinned, so the next run retries
+            if script != FALLBACK_SCRIPT:
+                write_fingerprint(fingerprint_path, fingerprint)
         
-        if audio_segments:
-            success = combine_audio_segments(audio_segments, audio_path)
-            if not success:
-                print("Failed to generate podcast audio.")
+        # Step 2: Generate audio
+        print("Generating podcast audio...")
+        try:
+            segments = parse_podcast_script(script_path)
+            audio_segments = create_podcast_audio(segments, os.path.join(output_dir, "audio_segments"))
+            
+            if audio_segments:
+                success = combine_audio_segments(audio_segments, audio_path, use_cache=use_cache)
+                if not success:
+                    print("Failed to generate podcast audio.")
+                    return False
+            else:
+                print("No audio segments generated.")
                 return False
-        else:
-            print("No audio segments generated.")
+        except Exception as e:
+            print(f"Error generating podcast audio: {e}")
             return False
-    except Exception as e:
-        print(f"Error generating podcast audio: {e}")
-        return False
     
     # Step 3: Generate video
-    if HAS_VIDEO:
+    create_podcast_video = load_video_generator()
+    if create_podcast_video:
         print("Generating podcast video...")
         try:
             success = create_podcast_video(audio_path, script_path, video_path)
@@ -319,6 +608,8 @@ Examples:
     # Date arguments with flexible parsing
     parser.add_argument('--after', type=str, help='Start date (flexible format, e.g., 20250616 or 2025/06/16)')
     parser.add_argument('--before', type=str, help='End date (flexible format)')
+    parser.add_argument('--max_results', type=int, default=MAX_RESULTS,
+                        help=f'Most messages to fetch, newest first (default: {MAX_RESULTS})')
     
     # Optional directory arguments - will be auto-generated if not provided
     parser.add_argument('--outdir', type=str, help='Base output directory (subdirs will be created for eml and markdown)')
@@ -329,17 +620,34 @@ Examples:
     parser.add_argument('--filter', type=str, help='Human-readable filter for email subjects/bodies')
     parser.add_argument('--skip_llm_filter', action='store_true', help='Skip LLM filtering, download all fetched emails')
     parser.add_argument('--llm_filter_on_body', action='store_true', help='Include email body in LLM filtering')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore cached LLM filter decisions, summaries, scripts and TTS audio, and generate everything again')
+    parser.add_argument('--semantic_cache', action='store_true',
+                        help='Reuse LLM filter decisions for emails that are near-duplicates (by embedding) of ones already decided')
+    parser.add_argument('--filter_keywords', nargs='+',
+                        help='Only fetch emails whose subject contains one of these keywords (matched by Gmail search, before any LLM filtering)')
+    parser.add_argument('--drop_pattern', type=str,
+                        help='Regex; emails whose subject matches are dropped without asking the LLM (case-insensitive)')
+    parser.add_argument('--keep_pattern', type=str,
+                        help='Regex; emails whose subject matches are kept without asking the LLM (case-insensitive, --drop_pattern wins)')
     
     # Podcast options
     parser.add_argument('--generate_podcast', action='store_true', help='Generate podcast from markdown files')
     parser.add_argument('--podcast_duration', type=int, default=30, help='Podcast duration in minutes (default: 30)')
     parser.add_argument('--podcast_outdir', type=str, help='Directory for podcast files (auto-generated if not specified)')
     parser.add_argument('--skip_markdown', action='store_true', help='Skip email processing, generate podcast from existing markdown')
+    parser.add_argument('--stream_audio', action='store_true',
+                        help='Start audio generation while the podcast script is still being written')
+    parser.add_argument('--summarize_articles', action='store_true',
+                        help='Summarize each article in parallel before writing the script, so large batches are covered without truncation')
     
     # Other options
-    parser.add_argument('--tempdir', type=str, default='.', help='Directory for temp files (default: current dir)')
+    parser.add_argument('--tempdir', type=str, default='.', help='Directory for the --dump_ids file (default: current dir)')
+    parser.add_argument('--dump_ids', action='store_true',
+                        help='Also write the filtered message IDs to pipeline_filtered_message_ids.txt in --tempdir')
     parser.add_argument('--mark-processed', action='store_true', 
                         help='Mark emails as read and archive them after processing')
+    parser.add_argument('--workers', type=int, default=DOWNLOAD_WORKERS,
+                        help=f'Number of parallel .eml downloads (default: {DOWNLOAD_WORKERS})')
     
     args = parser.parse_args()
     
@@ -358,7 +666,6 @@ Examples:
     if args.outdir:
         # If base output directory is specified, use it for all subdirectories
         base_dir = args.outdir
-        os.makedirs(base_dir, exist_ok=True)
         eml_dir = args.eml_outdir or os.path.join(base_dir, 'eml')
         md_dir = args.md_outdir or os.path.join(base_dir, 'markdown')
         podcast_dir = args.podcast_outdir or os.path.join(base_dir, 'podcast')
@@ -371,6 +678,17 @@ Examples:
         podcast_base = md_dir.replace('_markdown', '_podcast')
         podcast_dir = args.podcast_outdir or podcast_base
 
+    # Create every directory the selected steps write to, once, up front
+    out_dirs = []
+    if not args.skip_markdown:
+        out_dirs += [eml_dir, md_dir]
+        if args.dump_ids:
+            out_dirs.append(args.tempdir)
+    if args.generate_podcast:
+        out_dirs.append(podcast_dir)
+    for d in out_dirs:
+        Path(d).mkdir(parents=True, exist_ok=True)
+
     gemini_api_key = os.getenv('GEMINI_API_KEY')
     
     if not args.skip_llm_filter and not gemini_api_key:
@@ -380,6 +698,10 @@ Examples:
         print("Please set the GEMINI_API_KEY environment variable for script and audio generation.")
         return
     
+    # Start the Markdown conversion workers while the process is still
+    # single-threaded, before any Gmail or Gemini client threads exist
+    conversion_pool = None if args.skip_markdown else create_conversion_pool()
+    
     if gemini_api_key:
         genai.configure(api_key=gemini_api_key)
 
@@ -388,20 +710,23 @@ Examples:
         service = authenticate_gmail()
         # Step 1 & 2: Fetch and filter
         relevant_ids, _ = fetch_and_filter_ids(
-            service, senders, after_parsed, before_parsed, filter_description, args.tempdir, args.skip_llm_filter, args.llm_filter_on_body
+            service, senders, after_parsed, before_parsed, filter_description, args.tempdir if args.dump_ids else None, args.skip_llm_filter, args.llm_filter_on_body,
+            use_cache=not args.no_cache, semantic_cache=args.semantic_cache,
+            keep_pattern=args.keep_pattern, drop_pattern=args.drop_pattern, subject_keywords=args.filter_keywords,
+            max_results=args.max_results
         )
-        # Step 3: Download .eml files
-        print(f"Downloading .eml files to {eml_dir}...")
-        download_emls(service, relevant_ids, eml_dir, args.mark_processed)
-        # Step 4: Convert to Markdown
-        print(f"Converting .eml files to Markdown in {md_dir}...")
-        convert_all_eml_to_markdown(eml_dir, md_dir)
+        # Step 3 & 4: Download .eml files, converting each to Markdown as it
+        # arrives, then convert anything already in the directory
+        print(f"Downloading .eml files to {eml_dir} and converting to Markdown in {md_dir}...")
+        converted = download_emls(service, relevant_ids, eml_dir, args.mark_processed, args.workers, md_dir=md_dir)
+        with conversion_pool:
+            convert_all_eml_to_markdown(eml_dir, md_dir, skip=converted, executor=conversion_pool)
         print("Markdown conversion complete!")
     
     # Step 5: Generate podcast (if requested)
     if args.generate_podcast:
         print("Starting podcast generation...")
-        success = generate_podcast_from_markdown(md_dir, podcast_dir, args.podcast_duration)
+        success = generate_podcast_from_markdown(md_dir, podcast_dir, args.podcast_duration, args.stream_audio, args.summarize_articles, use_cache=not args.no_cache)
         if success:
             print("Full pipeline complete!")
         else: